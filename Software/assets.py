@@ -0,0 +1,204 @@
+"""Background-decoded image/GIF cache for the menu and the scoreboard.
+
+QImage decoding and scaling are thread-safe, so a worker thread reads every
+asset once at startup; the UI thread only wraps a ready QImage into a
+QPixmap when it is shown. GIFs are decoded to (QImage, delay_ms) frames,
+capped at `max_px` on the long side and `max_ms` of play time (nothing
+after that is ever shown), and the whole cache is held under `budget_mb`
+by evicting the least recently used asset. An evicted or not-yet-decoded
+asset is queued again and the caller falls back to loading it directly.
+
+FIVELINK_ASSET_MB sets the memory budget (default 96).
+"""
+import collections, os, queue, sys, threading
+
+from PyQt5.QtCore import QObject, QSize, Qt, QTimer
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+BUDGET_MB = float(os.environ.get("FIVELINK_ASSET_MB", "96"))
+GIF_PX    = 360                                  # long side of a decoded GIF frame
+GIF_MS    = 3000                                 # play time decoded per GIF
+
+# 2-3 bytes a pixel instead of 4; GIFs only have 256 colours a frame anyway
+_OPAQUE = QImage.Format_RGB16
+_ALPHA  = QImage.Format_ARGB8565_Premultiplied
+
+
+class Gif:
+    def __init__(self, frames):
+        self.frames = frames                 # [(QImage, delay_ms)]
+        self.nbytes = sum(im.sizeInBytes() for im, _ in frames)
+
+
+def _decode_gif(path, max_px, max_ms):
+    r = QImageReader(path)
+    frames, t = [], 0
+    while t < max_ms:
+        im = r.read()
+        if im.isNull():
+            break
+        if max(im.width(), im.height()) > max_px:
+            im = im.scaled(max_px, max_px, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        im = im.convertToFormat(_ALPHA if im.hasAlphaChannel() else _OPAQUE)
+        d = max(r.nextImageDelay(), 20)
+        frames.append((im, d))
+        t += d
+    if not frames:
+        raise OSError(f"cannot decode {path}: {r.errorString()}")
+    return Gif(frames)
+
+
+def _decode_image(path, size):
+    im = QImage(path)
+    if im.isNull():
+        raise OSError(f"cannot read {path}")
+    if size is not None:
+        im = im.scaled(size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+    return im
+
+
+class AssetCache:
+    def __init__(self, budget_mb=BUDGET_MB):
+        self.budget = int(budget_mb * 1e6)
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._items = collections.OrderedDict()  # key → Gif | QImage, LRU first
+        self._lock = threading.Lock()
+        self._queued = set()
+        self._q = queue.Queue()
+        self._gifs = []                          # scanned GIF paths
+        threading.Thread(target=self._work, name="assets", daemon=True).start()
+
+    # background
+
+    def _work(self):
+        while True:
+            key, fn = self._q.get()
+            try:
+                item = fn()
+            except Exception as exc:  # noqa: BLE001
+                print("[assets]", exc, file=sys.stderr)
+                item = None
+            with self._lock:
+                self._queued.discard(key)
+                if item is not None:
+                    self._put(key, item)
+
+    def _put(self, key, item):
+        size = item.nbytes if isinstance(item, Gif) else item.sizeInBytes()
+        if size > self.budget:
+            print(f"[assets] {key[1]} alone exceeds the budget, not cached", file=sys.stderr)
+            return
+        while self._items and self.nbytes + size > self.budget:
+            _, old = self._items.popitem(last=False)
+            self.nbytes -= old.nbytes if isinstance(old, Gif) else old.sizeInBytes()
+            self.evictions += 1
+        self._items[key] = item
+        self.nbytes += size
+
+    def _request(self, key, fn):
+        with self._lock:
+            if key in self._items or key in self._queued:
+                return
+            self._queued.add(key)
+        self._q.put((key, fn))
+
+    def _get(self, key, fn):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item
+            self.misses += 1
+        self._request(key, fn)
+        return None
+
+    # GIFs
+
+    def preload_gifs(self, folder, max_px=GIF_PX, max_ms=GIF_MS):
+        """Scan folder once and decode every GIF in the background.
+
+        Ask gif() / ready_gifs() with the same max_px and max_ms.
+        """
+        try:
+            names = sorted(f for f in os.listdir(folder) if f.lower().endswith(".gif"))
+        except OSError as exc:
+            print(f"[assets] no GIF folder {folder!r}:", exc, file=sys.stderr)
+            names = []
+        self._gifs = [os.path.join(folder, f) for f in names]
+        for p in self._gifs:
+            self.gif(p, max_px, max_ms)
+        return list(self._gifs)
+
+    @property
+    def gif_paths(self):
+        return list(self._gifs)
+
+    def gif(self, path, max_px=GIF_PX, max_ms=GIF_MS):
+        """Decoded Gif, or None if it is not ready yet (it is queued then)."""
+        return self._get(("gif", path, max_px, max_ms), lambda: _decode_gif(path, max_px, max_ms))
+
+    def ready_gifs(self, max_px=GIF_PX, max_ms=GIF_MS):
+        with self._lock:
+            return [p for p in self._gifs if ("gif", p, max_px, max_ms) in self._items]
+
+    # still images
+
+    def preload_image(self, path, size=None):
+        self.image(path, size)
+
+    def image(self, path, size=None):
+        """QPixmap scaled to cover `size` (QSize or None), or None if not ready."""
+        size = QSize(size) if size is not None else None
+        key = ("img", path, None if size is None else (size.width(), size.height()))
+        im = self._get(key, lambda: _decode_image(path, size))
+        return None if im is None else QPixmap.fromImage(im)
+
+    def stats(self):
+        with self._lock:
+            return {"items": len(self._items), "mb": self.nbytes / 1e6, "budget_mb": self.budget / 1e6,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "queued": len(self._queued)}
+
+
+class GifPlayer(QObject):
+    """Plays a decoded Gif on a QLabel; frames become pixmaps only when shown."""
+
+    def __init__(self, label):
+        super().__init__(label)
+        self.label = label
+        self._gif = None
+        self._i = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._next)
+
+    def play(self, gif):
+        self._gif, self._i = gif, 0
+        self._show()
+
+    def _show(self):
+        im, delay = self._gif.frames[self._i]
+        self.label.setPixmap(QPixmap.fromImage(im))
+        self._timer.start(delay)
+
+    def _next(self):
+        if self._gif is None:
+            return
+        self._i = (self._i + 1) % len(self._gif.frames)
+        self._show()
+
+    def stop(self):
+        self._timer.stop()
+        self._gif = None
+
+
+_cache = None
+
+def cache():
+    """Process-wide AssetCache (created on first use, needs a QApplication)."""
+    global _cache
+    if _cache is None:
+        _cache = AssetCache()
+    return _cache
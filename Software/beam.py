@@ -0,0 +1,169 @@
+"""Beam-break goal capture: timestamped edges, software debounce, batch drain.
+
+The edge callback only stamps the edge (time.monotonic_ns) and its level and
+appends it to a deque; append/popleft are atomic, so the capture side never
+takes a lock or waits for the UI. The UI calls drain() on a short timer and
+gets every goal since the last call, each with its capture time.
+
+Debounce/pairing, with the beam pulling the pin LOW while broken:
+  * a fall starts a break; it is a goal once the beam has stayed broken for
+    MIN_BREAK_S (decided as soon as that is known, not on the rise)
+  * a break that clears sooner is dropped: a glitch, or contact bounce if
+    it starts within REARM_S of a goal's rise
+  * breaks inside REARM_S are still paired and scored, so balls that follow
+    each other closely all count
+
+The edge deque holds QUEUE_LEN edges; if the UI stalls that long the oldest
+are lost, and stats() counts them as overflows.
+
+RPi.GPIO is used when present (no bouncetime: that would drop the edges we
+need). Otherwise, or with FIVELINK_BEAM=sim, SimulatedBeam feeds the same
+path; pulse() fakes a ball with optional bounce.
+"""
+import collections, os, random, sys, threading, time
+
+MIN_BREAK_S = 0.002        # shortest break that is a ball, not noise
+REARM_S     = 0.050        # short breaks this long after a goal's beam clears are bounce
+QUEUE_LEN   = 4096
+
+BROKEN, CLEAR = 0, 1       # pin levels
+
+
+class BeamCapture:
+    """Edge queue plus the debounce state machine; sources call edge()."""
+
+    def __init__(self, min_break_s=MIN_BREAK_S, rearm_s=REARM_S):
+        self.min_break = int(min_break_s * 1e9)
+        self.rearm = int(rearm_s * 1e9)
+        self._edges = collections.deque(maxlen=QUEUE_LEN)
+        self._start = None         # ns of the fall of the break in progress
+        self._counted = False      # that break is already a goal
+        self._quiet_until = 0
+        self.edges = self.goals = self.glitches = self.bounces = self.overflows = 0
+
+    def edge(self, level, t_ns=None):
+        """Called from the interrupt/callback thread: stamp and queue, nothing else."""
+        if len(self._edges) == QUEUE_LEN:      # full: the append pushes the oldest edge out
+            self.overflows += 1
+        self._edges.append((time.monotonic_ns() if t_ns is None else t_ns, level))
+
+    def drain(self, now_ns=None):
+        """Goal capture times (ns, monotonic) since the last call, oldest first."""
+        out = []
+        pop = self._edges.popleft
+        while True:
+            try:
+                t, level = pop()
+            except IndexError:
+                break
+            self.edges += 1
+            self._step(t, level, out)
+        now = time.monotonic_ns() if now_ns is None else now_ns
+        if self._start is not None and not self._counted and now - self._start >= self.min_break:
+            self._counted = True               # still broken: score now, not on exit
+            self.goals += 1
+            out.append(self._start)
+        return out
+
+    def _step(self, t, level, out):
+        if level == BROKEN:
+            if self._start is None:            # else missed the rise; stay in this break
+                self._start, self._counted = t, False
+            return
+        if self._start is None:                # rise with no break (or bounce)
+            if t < self._quiet_until:
+                self.bounces += 1
+            return
+        if t - self._start < self.min_break:   # too short for a ball
+            if self._start < self._quiet_until:
+                self.bounces += 1
+            else:
+                self.glitches += 1
+        else:
+            if not self._counted:
+                self.goals += 1
+                out.append(self._start)
+            self._quiet_until = t + self.rearm
+        self._start = None
+
+    def stats(self):
+        return {"edges": self.edges, "goals": self.goals, "glitches": self.glitches,
+                "bounces": self.bounces, "overflows": self.overflows, "queued": len(self._edges)}
+
+
+class GpioBeam(BeamCapture):
+    def __init__(self, pin, **kw):
+        super().__init__(**kw)
+        import RPi.GPIO as GPIO
+        self.GPIO, self.pin = GPIO, pin
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        GPIO.add_event_detect(pin, GPIO.BOTH, callback=self._callback)
+
+    def _callback(self, ch):
+        t = time.monotonic_ns()                # stamp first, then read the level
+        self.edge(self.GPIO.input(ch), t)
+
+    def close(self):
+        try:
+            self.GPIO.remove_event_detect(self.pin)
+            self.GPIO.cleanup(self.pin)
+        except Exception as exc:  # noqa: BLE001
+            print("[beam] GPIO cleanup:", exc, file=sys.stderr)
+
+
+class SimulatedBeam(BeamCapture):
+    """Software edges through the same queue, for tests and the <space> key."""
+
+    def pulse(self, break_s=0.02, bounce=0, bounce_s=0.0005, block=False):
+        """One ball: fall, `bounce` chatter pairs on each edge, rise after break_s."""
+        def run():
+            for level, hold in ((BROKEN, break_s), (CLEAR, 0.0)):
+                self.edge(level)
+                for _ in range(bounce):
+                    time.sleep(bounce_s)
+                    self.edge(1 - level)
+                    time.sleep(bounce_s)
+                    self.edge(level)
+                time.sleep(hold)
+        if block:
+            run()
+        else:
+            threading.Thread(target=run, daemon=True).start()
+
+    def rain(self, per_min, stop):
+        """Random goals (Poisson, per_min a minute) until stop is set."""
+        def run():
+            while not stop.wait(random.expovariate(per_min / 60.0)):
+                self.pulse(random.uniform(0.005, 0.05), bounce=random.randint(0, 3), block=True)
+        threading.Thread(target=run, daemon=True).start()
+
+    def close(self):
+        pass
+
+
+def open_beam(pin):
+    """GpioBeam on a Pi, else SimulatedBeam (FIVELINK_BEAM=sim forces it)."""
+    if os.environ.get("FIVELINK_BEAM") != "sim":
+        try:
+            return GpioBeam(pin)
+        except (ImportError, RuntimeError) as exc:
+            print("[beam] no GPIO → simulated beam:", exc, file=sys.stderr)
+    return SimulatedBeam()
+
+
+class Latency:
+    """Capture-to-display latency samples (ms)."""
+
+    def __init__(self, history=1000):
+        self.ms = collections.deque(maxlen=history)
+
+    def add(self, t_capture_ns, t_shown_ns=None):
+        self.ms.append(((time.monotonic_ns() if t_shown_ns is None else t_shown_ns) - t_capture_ns) / 1e6)
+
+    def summary(self):
+        xs = sorted(self.ms)
+        if not xs:
+            return "no goals"
+        pick = lambda p: xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+        return f"n={len(xs)} p50={pick(50):.2f} ms p99={pick(99):.2f} ms max={xs[-1]:.2f} ms"
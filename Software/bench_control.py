@@ -0,0 +1,185 @@
+"""Headless benchmark of one update_controller tick against the simulated motors.
+
+    python3 bench_control.py                 # 5000 ticks, text report
+    python3 bench_control.py --gui           # include pyqtgraph drawing (offscreen)
+    python3 bench_control.py --json out.json --max-p99-ms 5
+    python3 bench_control.py --velocity      # Jacobian jog mode
+
+Joystick input is synthetic (deterministic Lissajous sweep on both sticks and
+the trigger), so runs are comparable between commits. Bus writes stay on the
+calling thread (FIVELINK_IO_WORKERS=0) and --gui lifts the RENDER_FPS cap,
+so every tick pays for its own I/O and drawing.
+"""
+import argparse, contextlib, json, math, os, sys, time
+
+import numpy as np
+
+STAGES = ("poll", "ik", "set_pose", "nudge", "set_ratio", "plot", "render", "tick")
+PCTS   = (50, 90, 99, 99.9)
+LOOP_MS = 50                 # current control period on the Pi
+
+
+class _Timer:
+    def __init__(self):
+        self.samples = {k: [] for k in STAGES}
+        self._tick = None           # per-tick accumulator
+
+    def wrap(self, stage, fn):
+        def timed(*a, **kw):
+            t0 = time.perf_counter()
+            try:
+                return fn(*a, **kw)
+            finally:
+                self._tick[stage] += time.perf_counter() - t0
+        return timed
+
+    def begin(self):
+        self._tick = dict.fromkeys(STAGES, 0.0)
+
+    def end(self):
+        for k, v in self._tick.items():
+            self.samples[k].append(v)
+
+
+class _Proxy:
+    """Forward everything to `obj`, timing the listed methods."""
+    def __init__(self, obj, timer, **methods):
+        self._obj = obj
+        for name, stage in methods.items():
+            setattr(self, name, timer.wrap(stage, getattr(obj, name)))
+
+    def __getattr__(self, name):
+        return getattr(self._obj, name)
+
+
+def synthetic_pad(seed=0):
+    rng = np.random.default_rng(seed)
+    ph = rng.uniform(0, 2 * math.pi, 4)
+    state = {k: 0 for k in ("up", "down", "left", "right", "sel", "back", "ltrig")}
+    i = 0
+
+    def poll():
+        nonlocal i
+        t = i * 0.05
+        i += 1
+        return {
+            "event": dict(state),
+            "state": dict(state),
+            "axes": {
+                "lx": 0.0,
+                "ly": math.sin(0.3 * t + ph[0]),
+                "rx": math.sin(1.1 * t + ph[1]),
+                "ry": math.cos(0.7 * t + ph[2]),
+                "lt": math.sin(0.5 * t + ph[3]),
+            },
+        }
+    return poll
+
+
+def _load_game_logic(gui):
+    os.environ["FIVELINK_MOTORS"] = "sim"
+    os.environ.setdefault("FIVELINK_SIM_WIRE", "0")
+    os.environ["FIVELINK_IO_WORKERS"] = "0"       # bus writes inside the tick, not on a worker
+    if gui:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    elif "--headless" not in sys.argv:
+        sys.argv.append("--headless")
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        import game_logic
+    return game_logic
+
+
+def run(ticks=5000, warmup=200, gui=False, seed=0):
+    gl = _load_game_logic(gui)
+    tm = _Timer()
+
+    gl.controller.poll = tm.wrap("poll", synthetic_pad(seed))
+    gl.solve_ik   = tm.wrap("ik", gl.solve_ik)
+    gl.FiveBar    = _Proxy(gl.FiveBar, tm, set_pose="set_pose")
+    gl.Rail       = _Proxy(gl.Rail, tm, nudge="nudge")
+    gl.Gripper    = _Proxy(gl.Gripper, tm, set_ratio="set_ratio")
+    gl.set_slider = tm.wrap("plot", gl.set_slider)
+    app = None
+    if gui:
+        gl.link_lines.setData = tm.wrap("plot", gl.link_lines.setData)
+        app = gl.QtWidgets.QApplication.instance()
+        gl._frame_s = 0.0                         # no RENDER_FPS cap: draw every tick
+
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        for n in range(warmup + ticks):
+            tm.begin()
+            t0 = time.perf_counter()
+            gl.update_controller()
+            tm._tick["tick"] = time.perf_counter() - t0
+            if app is not None:
+                t1 = time.perf_counter()
+                app.processEvents()
+                tm._tick["render"] = time.perf_counter() - t1
+                tm._tick["tick"] += tm._tick["render"]
+            tm.end()
+            if n + 1 == warmup:
+                tm.samples = {k: [] for k in STAGES}
+                tx0 = _bus_counts(gl)
+    res = summarize(tm.samples, gui)
+    res["buses"] = {b: {k: (v - tx0.get(b, {}).get(k, 0)) / ticks for k, v in c.items()}
+                    for b, c in _bus_counts(gl).items()}
+    return res
+
+
+def _bus_counts(gl):
+    st = gl.motors.bus_stats()["buses"]
+    return {b: {"tx_bytes": s["tx_bytes"], "transactions": s["transactions"]} for b, s in st.items()}
+
+
+def summarize(samples, gui=False):
+    out = {"ticks": len(samples["tick"]), "gui": gui, "stages": {}}
+    for k in STAGES:
+        a = np.asarray(samples[k]) * 1e3      # ms
+        if not a.any():
+            continue
+        out["stages"][k] = {
+            "mean_ms": float(a.mean()),
+            **{f"p{p:g}_ms": float(np.percentile(a, p)) for p in PCTS},
+            "max_ms": float(a.max()),
+        }
+    tick = out["stages"]["tick"]
+    out["max_rate_hz"] = 1e3 / tick["p99_ms"]
+    out["mean_rate_hz"] = 1e3 / tick["mean_ms"]
+    out["budget_used_p99"] = tick["p99_ms"] / LOOP_MS
+    return out
+
+
+def report(res):
+    cols = ["mean_ms"] + [f"p{p:g}_ms" for p in PCTS] + ["max_ms"]
+    print(f"{res['ticks']} ticks, gui={res['gui']}")
+    print(f"{'stage':<10}" + "".join(f"{c[:-3]:>10}" for c in cols) + "   (ms)")
+    for k, st in res["stages"].items():
+        print(f"{k:<10}" + "".join(f"{st[c]:>10.4f}" for c in cols))
+    for b, c in res.get("buses", {}).items():
+        print(f"bus {b:<6} {c['transactions']:.3f} transactions/tick, {c['tx_bytes']:.1f} B/tick")
+    print(f"max sustainable rate (p99): {res['max_rate_hz']:.0f} Hz, "
+          f"mean: {res['mean_rate_hz']:.0f} Hz, "
+          f"p99 uses {100 * res['budget_used_p99']:.2f}% of the {LOOP_MS} ms loop")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--ticks", type=int, default=5000)
+    ap.add_argument("--warmup", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--gui", action="store_true", help="time plot drawing too")
+    ap.add_argument("--velocity", action="store_true", help="game_logic --velocity jog mode")
+    ap.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    ap.add_argument("--max-p99-ms", type=float, help="exit 1 if tick p99 exceeds this")
+    args = ap.parse_args()
+    if args.velocity:
+        sys.argv.append("--velocity")
+
+    res = run(args.ticks, args.warmup, args.gui, args.seed)
+    report(res)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(res, f, indent=2)
+    if args.max_p99_ms is not None and res["stages"]["tick"]["p99_ms"] > args.max_p99_ms:
+        print(f"FAIL: tick p99 {res['stages']['tick']['p99_ms']:.3f} ms > {args.max_p99_ms} ms")
+        sys.exit(1)
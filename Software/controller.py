@@ -1,81 +1,206 @@
-
-
-import pygame
-pygame.init()
-
-HAT_IDX = 0
-
-_BTN = {
-    "sel"  : 0,   # ✕
-    "back" : 1,   # ◯
-    "ltrig": 6,   # L2 digital click
-}
-
-_AX  = {
-    "lx": 0, "ly": 1,     # left stick
-    "rx": 3, "ry": 4,     # right stick
-    "lt": 2,              # L2 analogue trigger
-}
-
-
-try:
-    JS = pygame.joystick.Joystick(0)
-    JS.init()
-except pygame.error:
-    JS = None
-
-_prev = dict.fromkeys(
-    ["up","down","left","right", * _BTN], 0
-)
-
-
-def _dig_now():
-
-    now = {}
-
-
-    if JS and JS.get_numhats() > HAT_IDX:
-        hx, hy = JS.get_hat(HAT_IDX)
-        now.update({
-            "up":    int(hy > 0),
-            "down":  int(hy < 0),
-            "left":  int(hx < 0),
-            "right": int(hx > 0),
-        })
-    else:
-        now.update({k:0 for k in ("up","down","left","right")})
-
-
-    for k, idx in _BTN.items():
-        now[k] = JS.get_button(idx) if JS else 0
-    return now
-
-def _axes_now():
-
-    return {k: JS.get_axis(i) if JS else 0.0 for k,i in _AX.items()}
-
-def poll():
-    if JS:
-        for _ in pygame.event.get():
-            pass
-
-    now   = _dig_now()
-    event = {k: int(now[k] and not _prev[k]) for k in now}
-    _prev.update(now)
-
-    return {
-        "event": event,
-        "state": now,
-        "axes" : _axes_now(),
-    }
-
-
-if __name__ == "__main__":
-    import time, pprint
-    print("Polling… Ctrl-C to quit")
-    try:
-        while True:
-            pprint.pprint(poll())
-            time.sleep(0.1)
-    except KeyboardInterrupt:
-        print()
+
+
+import os
+import pad_shm
+
+# FIVELINK_PAD=local ignores a running pad_shm owner and opens the joystick here,
+# FIVELINK_PAD=replay:<file> plays back a pad_replay recording instead of a pad,
+# FIVELINK_PAD=udp:[host:]port takes a remote pad from pad_net,
+# FIVELINK_JOYSTICK picks the pad index (one per station)
+PAD_MODE = os.environ.get("FIVELINK_PAD", "auto")
+_replay = _net = None
+if PAD_MODE.startswith("replay:"):
+    import pad_replay
+    _replay = pad_replay.Player(PAD_MODE[len("replay:"):],
+                                float(os.environ.get("FIVELINK_REPLAY_SPEED", "1")))
+elif PAD_MODE.startswith("udp:"):
+    import pad_net
+    _net = pad_net.Receiver(pad_net.parse_addr(PAD_MODE[len("udp:"):]))
+_shm = pad_shm.attach() if PAD_MODE != "local" and _replay is None and _net is None else None
+_local = _shm is None and _replay is None and _net is None
+if _local:                           # only the pad owner pays for pygame/SDL
+    import pygame
+    pygame.init()
+
+JS_INDEX = int(os.environ.get("FIVELINK_JOYSTICK", "0"))
+HAT_IDX = 0
+
+_BTN = {
+    "sel"  : 0,   # ✕
+    "back" : 1,   # ◯
+    "ltrig": 6,   # L2 digital click
+}
+
+_AX  = {
+    "lx": 0, "ly": 1,     # left stick
+    "rx": 3, "ry": 4,     # right stick
+    "lt": 2,              # L2 analogue trigger
+}
+
+
+JS = None
+if _local:
+    try:
+        JS = pygame.joystick.Joystick(JS_INDEX)
+        JS.init()
+    except pygame.error:
+        JS = None
+
+_JS_ID = JS.get_instance_id() if JS else None
+
+_prev = dict.fromkeys(
+    ["up","down","left","right", * _BTN], 0
+)
+
+
+def _dig_now():
+
+    now = {}
+
+
+    if JS and JS.get_numhats() > HAT_IDX:
+        hx, hy = JS.get_hat(HAT_IDX)
+        now.update({
+            "up":    int(hy > 0),
+            "down":  int(hy < 0),
+            "left":  int(hx < 0),
+            "right": int(hx > 0),
+        })
+    else:
+        now.update({k:0 for k in ("up","down","left","right")})
+
+
+    for k, idx in _BTN.items():
+        now[k] = JS.get_button(idx) if JS else 0
+    return now
+
+def _axes_now():
+
+    return {k: JS.get_axis(i) if JS else 0.0 for k,i in _AX.items()}
+
+# event-driven edges: fn(name, pressed) for the same names as poll()["event"]
+
+_subs  = []
+_state = dict.fromkeys(_prev, 0)
+_BTN_NAME = {idx: k for k, idx in _BTN.items()}
+_JOY_EVENTS = (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION) if _local else ()
+
+
+def subscribe(fn):
+    """Call fn(name, pressed) on every digital edge. Returns an unsubscribe callable."""
+    _subs.append(fn)
+    return lambda: fn in _subs and _subs.remove(fn)
+
+
+def _emit(name, val):
+    if _state[name] == val:
+        return
+    _state[name] = val
+    for fn in list(_subs):
+        fn(name, bool(val))
+
+
+def pump():
+    """Drain pending pygame events and dispatch button/hat edges to subscribers.
+
+    Costs one pygame.event.get() when nothing happened; no device queries.
+    """
+    if not _local:
+        _pump_shm()
+        return
+    if not JS:
+        return
+    for e in pygame.event.get():
+        if e.type not in _JOY_EVENTS or getattr(e, "instance_id", getattr(e, "joy", None)) != _JS_ID:
+            continue
+        if e.type == pygame.JOYHATMOTION:
+            if e.hat != HAT_IDX:
+                continue
+            hx, hy = e.value
+            _emit("up",    int(hy > 0))
+            _emit("down",  int(hy < 0))
+            _emit("left",  int(hx < 0))
+            _emit("right", int(hx > 0))
+        elif e.button in _BTN_NAME:
+            _emit(_BTN_NAME[e.button], int(e.type == pygame.JOYBUTTONDOWN))
+
+
+_shm_seen = None
+
+def _pump_shm():
+    global _shm_seen
+    snap = (_shm or _replay or _net).snapshot()
+    if snap is None:
+        return
+    _, _, now, presses = snap
+    seen = _shm_seen or presses
+    _shm_seen = presses
+    for i, k in enumerate(pad_shm.DIGITAL):
+        if presses[i] != seen[i]:
+            _emit(k, 1)                  # press (and maybe release) since last pump
+        _emit(k, now[k])
+
+
+def state():
+    """Digital state as tracked from events (no device query)."""
+    return dict(_state)
+
+
+# FIVELINK_PAD_RECORD=<file> saves every poll() for pad_replay
+_REC_PATH = os.environ.get("FIVELINK_PAD_RECORD")
+if _REC_PATH:
+    import pad_replay
+    _rec = pad_replay.Recorder(_REC_PATH)
+else:
+    _rec = None
+
+
+def poll():
+    pad = _poll()
+    if _rec is not None:
+        _rec.record(pad)
+    return pad
+
+
+def _poll():
+    if _replay is not None:
+        return _replay.poll()
+    if _net is not None:
+        return _net.poll()
+    if _shm is not None:
+        return _shm.poll()
+    pump()
+
+    now   = _dig_now()
+    event = {k: int(now[k] and not _prev[k]) for k in now}
+    _prev.update(now)
+
+    return {
+        "event": event,
+        "state": now,
+        "axes" : _axes_now(),
+    }
+
+
+def close():
+    if _rec is not None:
+        _rec.close()
+    if _replay is not None:
+        _replay.close()
+    elif _net is not None:
+        _net.close()
+    elif _shm is not None:
+        _shm.shm.close()
+    else:
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    import time, pprint
+    print("Polling… Ctrl-C to quit")
+    try:
+        while True:
+            pprint.pprint(poll())
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        print()
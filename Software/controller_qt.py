@@ -0,0 +1,32 @@
+"""Qt side of controller.subscribe: one shared pump per process, edges as signals.
+
+    controller_qt.bridge().pressed.connect(self._on_pad)   # slot(name: str)
+"""
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+import controller
+
+PUMP_MS = 20   # only drains the SDL queue; nothing is queried when idle
+
+
+class PadBridge(QObject):
+    pressed  = pyqtSignal(str)
+    released = pyqtSignal(str)
+
+    def __init__(self, interval=PUMP_MS):
+        super().__init__()
+        self._unsub = controller.subscribe(self._edge)
+        self._timer = QTimer(self, interval=interval, timeout=controller.pump)
+        self._timer.start()
+
+    def _edge(self, name, pressed):
+        (self.pressed if pressed else self.released).emit(name)
+
+
+_bridge = None
+
+def bridge():
+    global _bridge
+    if _bridge is None:
+        _bridge = PadBridge()
+    return _bridge
@@ -0,0 +1,214 @@
+"""Always-on binary flight recorder for the control loop.
+
+Every control tick is one fixed-size record (stick axes, end effector, IK
+target and ramped joint setpoint, Dynamixel raw goals, rail/gripper, loop
+timing) written into a preallocated, memory-mapped ring file. A write is a
+single copy into the mapping plus a counter update: no syscalls, no locks,
+no allocation, and the kernel writes the pages back on its own time.
+
+The ring survives restarts: reopening continues after the last record with
+a new session number, so disk use stays fixed at CAPACITY records.
+
+    python3 flight_recorder.py                    # list sessions
+    python3 flight_recorder.py --session -1 --csv last.csv
+
+FIVELINK_FLIGHT=<path> moves the file, FIVELINK_FLIGHT=0 turns recording off.
+"""
+import math, os, sys, time
+import numpy as np
+
+from motors import command
+
+PATH     = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "flight.rec")
+CAPACITY = 1 << 18          # ≈ 44 min at 100 Hz, 20 MB
+VERSION  = 1
+MAGIC    = b"FLIGHTRC"
+
+FLAG_OVERRUN = 1            # tick started after the following deadline
+
+RECORD = np.dtype([
+    ("t",        "<f8"),            # wall clock (s since epoch)
+    ("tick",     "<u4"),            # tick number within the session
+    ("session",  "<u2"),
+    ("flags",    "<u2"),
+    ("axes",     "<f4", (4,)),      # rx, ry, ly, lt as polled
+    ("ee",       "<f4", (2,)),      # end effector x, y
+    ("target",   "<f4", (2,)),      # IK joint angles th1, th2 (rad)
+    ("setpoint", "<f4", (2,)),      # ramped joint setpoint sent to FiveBar (rad)
+    ("raw",      "<u2", (2,)),      # Dynamixel goal positions, right / left
+    ("rail",     "<f4"),            # 0..1
+    ("grip",     "<f4"),            # 0..1
+    ("late_ms",  "<f4"),            # start - deadline
+    ("work_ms",  "<f4"),            # step duration
+])
+
+HEADER = np.dtype([
+    ("magic",    "S8"),
+    ("version",  "<u4"),
+    ("rec_size", "<u4"),
+    ("capacity", "<u8"),
+    ("count",    "<u8"),            # records ever written; slot = count % capacity
+    ("session",  "<u4"),
+    ("_pad",     "V28"),
+])
+HEADER_SIZE = 64
+AXES = ("rx", "ry", "ly", "lt")
+
+_NAN2 = (math.nan, math.nan)
+
+
+class Recorder:
+    def __init__(self, path=PATH, capacity=CAPACITY):
+        self.path, self.capacity = path, int(capacity)
+        size = HEADER_SIZE + self.capacity * RECORD.itemsize
+        if not self._compatible(size):
+            self._create(size)
+        self._hdr = np.memmap(path, HEADER, "r+", 0, (1,))
+        self._rec = np.memmap(path, RECORD, "r+", HEADER_SIZE, (self.capacity,))
+        self._rec.view(np.uint8)[::4096].sum()    # fault the pages in now, not mid-game
+        self._count = int(self._hdr["count"][0])
+        self.session = int(self._hdr["session"][0])
+        self.tick = 0
+        self.errors = 0
+
+    def _compatible(self, size):
+        try:
+            if os.path.getsize(self.path) != size:
+                return False
+            h = np.fromfile(self.path, HEADER, 1)[0]
+        except (OSError, IndexError):
+            return False
+        return (h["magic"] == MAGIC and h["version"] == VERSION
+                and h["rec_size"] == RECORD.itemsize and h["capacity"] == self.capacity)
+
+    def _create(self, size):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        h = np.zeros(1, HEADER)
+        h["magic"], h["version"] = MAGIC, VERSION
+        h["rec_size"], h["capacity"] = RECORD.itemsize, self.capacity
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:                 # real zeros, not a sparse hole
+            f.write(h.tobytes().ljust(HEADER_SIZE, b"\0"))
+            chunk = bytes(1 << 20)
+            left = size - HEADER_SIZE
+            while left > 0:
+                f.write(chunk[:min(left, len(chunk))])
+                left -= len(chunk)
+        os.replace(tmp, self.path)
+
+    def begin(self):
+        """Start a new session; call when a control loop starts."""
+        self.session = (self.session + 1) & 0xFFFF
+        self._hdr["session"] = self.session
+        self.tick = 0
+        return self.session
+
+    def record(self, snap, late, work, period):
+        """Append one control_step snapshot. Never raises into the control loop."""
+        try:
+            ax = snap.get("axes") or {}
+            tgt = snap.get("target") or _NAN2
+            sp = snap.get("setpoint") or _NAN2
+            servo = snap.get("servo")
+            raw = (command.dxl_raw(servo[0]), command.dxl_raw(servo[1])) if servo else (0, 0)
+            grip = snap.get("grip")
+            self._rec[self._count % self.capacity] = (
+                time.time(), self.tick, self.session,
+                FLAG_OVERRUN if late + work > period else 0,
+                tuple(ax.get(k, math.nan) for k in AXES), snap["end_effector"],
+                tgt, sp, raw, snap["rail"], math.nan if grip is None else grip,
+                late * 1e3, work * 1e3,
+            )
+            self._count += 1
+            self._hdr["count"] = self._count    # after the record: readers never see a torn tail
+            self.tick += 1
+        except Exception as exc:  # noqa: BLE001
+            self.errors += 1
+            if self.errors == 1:
+                print("[flight] record failed:", exc, file=sys.stderr)
+
+    def close(self):
+        for m in (self._rec, self._hdr):
+            m.flush()
+
+
+def open_default():
+    """Recorder at FIVELINK_FLIGHT (or PATH); None if disabled or it cannot be opened."""
+    path = os.environ.get("FIVELINK_FLIGHT", PATH)
+    if path == "0":
+        return None
+    try:
+        return Recorder(path)
+    except (OSError, ValueError) as exc:
+        print(f"[flight] recorder off ({path}):", exc, file=sys.stderr)
+        return None
+
+
+# reading
+
+def load_all(path=PATH):
+    """Every record still in the ring, oldest first (a structured array)."""
+    h = np.fromfile(path, HEADER, 1)[0]
+    if h["magic"] != MAGIC or h["version"] != VERSION or h["rec_size"] != RECORD.itemsize:
+        raise ValueError(f"{path}: not a v{VERSION} flight recording")
+    cap, n = int(h["capacity"]), int(h["count"])
+    rec = np.fromfile(path, RECORD, cap, offset=HEADER_SIZE)
+    if n <= cap:
+        return rec[:n]
+    return np.roll(rec, -(n % cap))
+
+
+def sessions(path=PATH):
+    """[(session, records, t_first, t_last)] in recording order."""
+    rec = load_all(path)
+    out = []
+    if not rec.size:
+        return out
+    cut = np.flatnonzero(np.diff(rec["session"].astype(np.int64))) + 1
+    for part in np.split(rec, cut):
+        out.append((int(part["session"][0]), len(part), float(part["t"][0]), float(part["t"][-1])))
+    return out
+
+
+def load(path=PATH, session=-1):
+    """Records of one session as a structured array: rec["ee"] is (N, 2), etc.
+
+    session=-1 is the newest, -2 the one before; a non-negative value is a
+    session number. A session partly overwritten by the ring starts late.
+    """
+    rec = load_all(path)
+    if session < 0:
+        ids = [s for s, *_ in sessions(path)]
+        if len(ids) < -session:
+            return rec[:0]
+        session = ids[session]
+    return rec[rec["session"] == session]
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("path", nargs="?", default=os.environ.get("FIVELINK_FLIGHT", PATH))
+    ap.add_argument("--session", type=int, help="session number, or -1 for the newest")
+    ap.add_argument("--csv", metavar="OUT", help="write the session as CSV")
+    args = ap.parse_args()
+
+    if args.session is None and not args.csv:
+        for s, n, t0, t1 in sessions(args.path):
+            print(f"session {s:5d}  {n:7d} ticks  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t0))}"
+                  f"  {t1 - t0:8.1f} s")
+        sys.exit(0)
+
+    rec = load(args.path, -1 if args.session is None else args.session)
+    work, late = rec["work_ms"], rec["late_ms"]
+    print(f"{len(rec)} ticks, overruns={int((rec['flags'] & FLAG_OVERRUN).astype(bool).sum())}, "
+          f"work p99={np.percentile(work, 99) if work.size else 0:.3f} ms, "
+          f"late p99={np.percentile(late, 99) if late.size else 0:.3f} ms")
+    if args.csv:
+        cols = ["t", "tick", "flags"] + list(AXES) + ["x", "y", "th1", "th2", "sp1", "sp2",
+                                                      "raw_right", "raw_left", "rail", "grip",
+                                                      "late_ms", "work_ms"]
+        table = np.column_stack([rec["t"], rec["tick"], rec["flags"], rec["axes"], rec["ee"],
+                                 rec["target"], rec["setpoint"], rec["raw"], rec["rail"],
+                                 rec["grip"], rec["late_ms"], rec["work_ms"]])
+        np.savetxt(args.csv, table, delimiter=",", header=",".join(cols), comments="", fmt="%.13g")
@@ -1,220 +1,671 @@
-import numpy as np
-import pygame
-import pyqtgraph as pg
-from pyqtgraph.Qt import QtWidgets, QtCore
-import sys
-import controller
-from PyQt5.QtCore import QTimer
-from motors import FiveBar, Rail, Gripper, torque_off
-
-DEADZONE = 0.10 # reduce drift
-headless = "--headless" in sys.argv
-
-if not headless:
-    app = QtWidgets.QApplication([])
-
-#  Pygame / joystick
-pygame.init()
-joystick = None
-if pygame.joystick.get_count() > 0:
-    joystick = pygame.joystick.Joystick(0)
-    joystick.init()
-    print("Joystick:", joystick.get_name())
-else:
-    print("No joystick detected!")
-
-#  5‑link geometry
-L1, L2 = 1.56, 3.25
-base1 = np.array([-0.45, 2.0])
-base2 = np.array([0.45, 2.0])
-end_effector = np.array([0.0, -2])
-
-# Rail / gripper visual parameters
-X_RAIL     = -3.0
-X_GRIPPER  =  3.0
-Y_MIN, Y_MAX = -3.0, 2.0   # slider range in plot coords
-
-
-
-#  IK solver
-
-
-def inverse_kinematics(x, y):
-    try:
-        if any([x<-2.5, x>2.5, y< -2.5, x>1 and y < -1.5]): # boundary for case and hoop
-            return None, None, None, None
-        d1 = np.linalg.norm([x - base1[0], y - base1[1]])
-        d2 = np.linalg.norm([x - base2[0], y - base2[1]])
-        if d1 > (L1 + L2) or d2 > (L1 + L2): # is arm long enough
-            return None, None, None, None
-        theta1 = -np.arccos((L1**2 + d1**2 - L2**2) / (2 * L1 * d1)) + np.arctan2(
-            y - base1[1], x - base1[0]
-        )
-        elbow1 = base1 + L1 * np.array([np.cos(theta1), np.sin(theta1)])
-        theta2 = np.arccos((L1**2 + d2**2 - L2**2) / (2 * L1 * d2)) + np.arctan2(
-            y - base2[1], x - base2[0]
-        )
-        elbow2 = base2 + L1 * np.array([np.cos(theta2), np.sin(theta2)])
-        #print (theta1, theta2, elbow1, elbow2) # for making constraints
-        if any([np.isnan(theta1), np.isnan(theta2), theta1 < -4.2, theta1 > -1.6, theta2 > 1.19, theta2 < -1.55]): # boundary for angles
-            return None, None, None, None
-        return elbow1, elbow2, theta1, theta2
-    except ValueError:
-        return None, None, None, None
-
-
-def is_within_workspace(x, y):
-    e1, e2, th1, th2= inverse_kinematics(x, y)
-    return e1 is not None and e2 is not None
-
-
-if not headless:
-    win = pg.GraphicsLayoutWidget(show=True)
-    win.setWindowTitle("5‑Bar Parallel Robot Kinematics")
-
-    plot = win.addPlot(row=0, col=1)
-    plot.setXRange(-3.5, 3.5)
-    plot.setYRange(-3.5, 2.5)
-    plot.setAspectLocked(True)
-    plot.showGrid(x=True, y=True)
-
-    square = QtWidgets.QGraphicsRectItem(-2.5, -3, 5, 5)
-    square.setPen(pg.mkPen("r", width=2))
-    plot.getViewBox().addItem(square)
-
-    base_points = plot.plot([base1[0], base2[0]], [base1[1], base2[1]], pen=None, symbol='o', symbolBrush='g')
-    link_lines  = plot.plot([], [], pen=pg.mkPen('r', width=2))
-
-    plot.plot([X_RAIL, X_RAIL], [Y_MIN, Y_MAX], pen=pg.mkPen('w', width=1, style=QtCore.Qt.PenStyle.DashLine))
-    plot.plot([X_GRIPPER, X_GRIPPER], [Y_MIN, Y_MAX], pen=pg.mkPen('w', width=1, style=QtCore.Qt.PenStyle.DashLine))
-    rail_marker    = plot.plot([X_RAIL],    [Y_MIN], pen=None, symbol='s', symbolSize=8, symbolBrush='y')
-    gripper_marker = plot.plot([X_GRIPPER], [Y_MIN], pen=None, symbol='s', symbolSize=8, symbolBrush='c')
-
-
-
-def update_plot():
-    # inverse kinematics
-
-    e1, e2 ,th1, th2 = inverse_kinematics(*end_effector)
-    if e1 is None:
-        return
-
-    # send to dynamixel
-
-    servo_right = 2 * (-th2)  # base-2 link drives RIGHT servo
-    servo_left = 2 * (-th1 + np.pi)  # base-1 link drives LEFT  servo
-
-    FiveBar.set_pose(servo_right, servo_left)  # ID-1 = right, ID-2 = left
-
-    if headless:
-        return
-
-
-    # draw links
-    link_lines.setData(
-        [base1[0], e1[0], end_effector[0], e2[0], base2[0]],
-        [base1[1], e1[1], end_effector[1], e2[1], base2[1]]
-    )
-
-
-
-
-
-def set_slider(marker, x_fixed, norm):
-    """norm ∈ [0,1] → marker at x_fixed, y between Y_MIN and Y_MAX."""
-    y = Y_MIN + norm * (Y_MAX - Y_MIN)
-    marker.setData([x_fixed], [y])
-
-
-_last_grip   = None
-
-def update_controller():
-    global _last_grip
-    pad = controller.poll()
-    ax  = pad["axes"]
-    
-
-    if pad["state"].get("back"):
-
-        #try: Rail.home()
-        #except Exception:pass
-        QtWidgets.QApplication.instance().quit()
-        return
-
-
-    dx, dy = ax["rx"], ax["ry"]
-    if abs(dx) > DEADZONE or abs(dy) > DEADZONE:
-        step = 0.05
-        nx = end_effector[0] + step * dx
-        ny = end_effector[1] - step * dy
-        if is_within_workspace(nx, ny):
-            end_effector[:] = (nx, ny)
-            update_plot()
-
-
-    rail_axis = -ax["ly"]
-    if abs(rail_axis) < DEADZONE:
-        rail_axis = 0.0
-
-    Rail.nudge(rail_axis)
-
-
-    if not headless:
-        rail_norm = Rail.get_norm()
-        set_slider(rail_marker, X_RAIL, rail_norm)
-
-
-    lt_raw = ax["lt"]
-    lt_norm = (lt_raw + 1.0) * 0.5
-
-
-    if lt_norm < DEADZONE:
-        lt_norm = 0.0
-
-
-
-
-    #send only when the value actually changes
-    global _last_grip  # declare the guard var
-    GRIP_STEP = 0.010
-
-    if _last_grip is None or float(abs(lt_norm - _last_grip)) > GRIP_STEP:  # <─ this line stops the spam
-        Gripper.set_ratio(lt_norm)
-        _last_grip = lt_norm  # remember what we sent
-        if not headless:
-            set_slider(gripper_marker, X_GRIPPER, lt_norm)
-
-
-
-
-
-# keyboard fallback
-
-def keyPressEvent(ev):
-    step = 0.05
-    if ev.key() == QtCore.Qt.Key_Escape:
-        QtWidgets.QApplication.instance().quit(); return
-    m = {QtCore.Qt.Key_Up:(0, step), QtCore.Qt.Key_Down:(0,-step),
-         QtCore.Qt.Key_Left:(-step,0), QtCore.Qt.Key_Right:(step,0)}
-    if ev.key() in m:
-        nx = end_effector[0] + m[ev.key()][0]
-        ny = end_effector[1] + m[ev.key()][1]
-        if is_within_workspace(nx, ny):
-            end_effector[:] = (nx, ny)
-            update_plot()
-
-
-
-if __name__ == '__main__':
-    if not headless:
-        win.keyPressEvent = keyPressEvent
-        update_plot()
-        t = QtCore.QTimer(); t.timeout.connect(update_controller); t.start(50)
-        QtWidgets.QApplication.instance().exec()
-        torque_off()
-    else:
-        try:
-            while True:
-                update_controller(); pygame.time.wait(50)
-        except KeyboardInterrupt:
-            pygame.quit()
+import startup
+import collections, math, threading, time, traceback
+import numpy as np
+import sys
+startup.mark("numpy")
+import controller
+startup.mark("controller")
+import workspace
+import trajectory
+import motors
+from motors import FiveBar, Rail, Gripper, torque_on, torque_off
+
+DEADZONE = 0.10 # reduce drift
+headless = "--headless" in sys.argv
+attach   = "--attach" in sys.argv    # draw a robot_server session; the daemon owns the buses
+lazy     = "--lazy" in sys.argv or attach   # connect motor buses on first command
+smooth   = "--raw" not in sys.argv   # --raw: send IK results straight to FiveBar
+velocity = "--velocity" in sys.argv  # jog through the Jacobian instead of per-tick IK
+
+if not headless:                     # Qt/pyqtgraph only when there is a window
+    import pyqtgraph as pg
+    from pyqtgraph.Qt import QtWidgets, QtCore
+    app = QtWidgets.QApplication([])
+    startup.mark("qt")
+
+# joint-space limits for the trajectory stage (servo angle = 2 × joint angle)
+JOINT_VMAX = 3.0                  # rad/s
+JOINT_AMAX = 20.0                 # rad/s²
+JOINT_LO, JOINT_HI = (-4.2, -1.55), (-1.6, 1.19)   # same as inverse_kinematics
+
+if not lazy:
+    motors.select()
+    if "--dxl-profile" in sys.argv:     # let the servos ramp between setpoints too
+        FiveBar.set_profile(2 * JOINT_VMAX, 2 * JOINT_AMAX)
+    startup.mark("motors")
+
+#  Joystick (opened by controller, or shared through pad_shm)
+if controller.JS:
+    print("Joystick:", controller.JS.get_name())
+elif controller._shm is not None:
+    print("Joystick: shared via pad_shm")
+elif controller._replay is not None:
+    print("Joystick: replaying", controller._replay.path)
+elif controller._net is not None:
+    print("Joystick: remote over UDP on {}:{}".format(*controller._net.addr))
+else:
+    print("No joystick detected!")
+
+#  5‑link geometry
+L1, L2 = 1.56, 3.25
+base1 = np.array([-0.45, 2.0])
+base2 = np.array([0.45, 2.0])
+HOME = (0.0, -2.0)
+end_effector = np.array(HOME)
+
+# Rail / gripper visual parameters
+X_RAIL     = -3.0
+X_GRIPPER  =  3.0
+Y_MIN, Y_MAX = -3.0, 2.0   # slider range in plot coords
+
+
+
+#  IK solver
+
+
+def inverse_kinematics(x, y):
+    try:
+        if any([x<-2.5, x>2.5, y< -2.5, x>1 and y < -1.5]): # boundary for case and hoop
+            return None, None, None, None
+        dx1, dy1 = x - base1[0], y - base1[1]
+        dx2, dy2 = x - base2[0], y - base2[1]
+        d1 = np.sqrt(dx1 * dx1 + dy1 * dy1) # same rounding as inverse_kinematics_batch
+        d2 = np.sqrt(dx2 * dx2 + dy2 * dy2)
+        if d1 > (L1 + L2) or d2 > (L1 + L2): # is arm long enough
+            return None, None, None, None
+        theta1 = -np.arccos((L1**2 + d1 * d1 - L2**2) / (2 * L1 * d1)) + np.arctan2(
+            dy1, dx1
+        )
+        elbow1 = base1 + L1 * np.array([np.cos(theta1), np.sin(theta1)])
+        theta2 = np.arccos((L1**2 + d2 * d2 - L2**2) / (2 * L1 * d2)) + np.arctan2(
+            dy2, dx2
+        )
+        elbow2 = base2 + L1 * np.array([np.cos(theta2), np.sin(theta2)])
+        #print (theta1, theta2, elbow1, elbow2) # for making constraints
+        if any([np.isnan(theta1), np.isnan(theta2), theta1 < -4.2, theta1 > -1.6, theta2 > 1.19, theta2 < -1.55]): # boundary for angles
+            return None, None, None, None
+        return elbow1, elbow2, theta1, theta2
+    except ValueError:
+        return None, None, None, None
+
+
+def inverse_kinematics_batch(points):
+    """Vectorised inverse_kinematics over an (N, 2) array of targets.
+
+    Returns (elbow1, elbow2, theta1, theta2, ok): elbows are (N, 2), angles (N,),
+    ok is a bool mask. Rows where ok is False are NaN, same limits as above.
+    """
+    p = np.asarray(points, dtype=float).reshape(-1, 2)
+    x, y = p[:, 0], p[:, 1]
+
+    ok = ~((x < -2.5) | (x > 2.5) | (y < -2.5) | ((x > 1) & (y < -1.5))) # boundary for case and hoop
+
+    dx1, dy1 = x - base1[0], y - base1[1]
+    dx2, dy2 = x - base2[0], y - base2[1]
+    d1 = np.sqrt(dx1 * dx1 + dy1 * dy1)
+    d2 = np.sqrt(dx2 * dx2 + dy2 * dy2)
+    ok &= (d1 <= (L1 + L2)) & (d2 <= (L1 + L2)) # is arm long enough
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        theta1 = -np.arccos((L1**2 + d1 * d1 - L2**2) / (2 * L1 * d1)) + np.arctan2(dy1, dx1)
+        theta2 = np.arccos((L1**2 + d2 * d2 - L2**2) / (2 * L1 * d2)) + np.arctan2(dy2, dx2)
+
+    ok &= ~(np.isnan(theta1) | np.isnan(theta2))
+    ok &= (theta1 >= -4.2) & (theta1 <= -1.6) & (theta2 <= 1.19) & (theta2 >= -1.55) # boundary for angles
+
+    theta1 = np.where(ok, theta1, np.nan)
+    theta2 = np.where(ok, theta2, np.nan)
+    elbow1 = base1 + L1 * np.column_stack((np.cos(theta1), np.sin(theta1)))
+    elbow2 = base2 + L1 * np.column_stack((np.cos(theta2), np.sin(theta2)))
+    return elbow1, elbow2, theta1, theta2, ok
+
+
+def joint_to_servo(th1, th2):
+    servo_right = 2 * (-th2)  # base-2 link drives RIGHT servo
+    servo_left = 2 * (-th1 + np.pi)  # base-1 link drives LEFT  servo
+    return servo_right, servo_left
+
+
+def joint_jacobian_batch(points, elbow1, elbow2, theta1, theta2):
+    """dθ/dp for each row of an IK solution: (N, 2, 2), row k = ∂θ_k/∂(x, y).
+
+    Moving the end effector by dp turns joint k by (w·dp) / (L1 · w·t), w the
+    distal link, t the proximal link's tangent; singular when w ⟂ t.
+    """
+    p = np.asarray(points, dtype=float).reshape(-1, 2)
+    out = np.empty((p.shape[0], 2, 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for k, (e, th) in enumerate(((elbow1, theta1), (elbow2, theta2))):
+            w = p - e
+            wt = -w[:, 0] * np.sin(th) + w[:, 1] * np.cos(th)
+            out[:, k, :] = w / (L1 * wt)[:, None]
+    return out
+
+
+# jog grid lookup table, rebuilt only when the geometry changes
+ik_table = workspace.load_or_build(inverse_kinematics_batch, joint_to_servo, joint_jacobian_batch,
+                                   (L1, L2, base1, base2))
+startup.mark("ik table")
+
+
+
+def solve_ik(x, y):
+    hit = ik_table.get(x, y)
+    return hit if hit is not None else inverse_kinematics(x, y)
+
+
+def is_within_workspace(x, y):
+    e1, e2, th1, th2= solve_ik(x, y)
+    return e1 is not None and e2 is not None
+
+
+if not headless:
+    win = pg.GraphicsLayoutWidget(show=True)
+    win.setWindowTitle("5‑Bar Parallel Robot Kinematics")
+
+    plot = win.addPlot(row=0, col=1)
+    plot.setXRange(-3.5, 3.5)
+    plot.setYRange(-3.5, 2.5)
+    plot.setAspectLocked(True)
+    plot.showGrid(x=True, y=True)
+
+    square = QtWidgets.QGraphicsRectItem(-2.5, -3, 5, 5)
+    square.setPen(pg.mkPen("r", width=2))
+    plot.getViewBox().addItem(square)
+
+    base_points = plot.plot([base1[0], base2[0]], [base1[1], base2[1]], pen=None, symbol='o', symbolBrush='g')
+    link_lines  = plot.plot([], [], pen=pg.mkPen('r', width=2))
+
+    plot.plot([X_RAIL, X_RAIL], [Y_MIN, Y_MAX], pen=pg.mkPen('w', width=1, style=QtCore.Qt.PenStyle.DashLine))
+    plot.plot([X_GRIPPER, X_GRIPPER], [Y_MIN, Y_MAX], pen=pg.mkPen('w', width=1, style=QtCore.Qt.PenStyle.DashLine))
+    rail_marker    = plot.plot([X_RAIL],    [Y_MIN], pen=None, symbol='s', symbolSize=8, symbolBrush='y')
+    gripper_marker = plot.plot([X_GRIPPER], [Y_MIN], pen=None, symbol='s', symbolSize=8, symbolBrush='c')
+    startup.mark("plot")
+
+
+
+def drive_arm():
+    """IK for end_effector → Dynamixel. Returns the elbows, or None if unreachable."""
+    global _elbows
+    e1, e2 ,th1, th2 = solve_ik(*end_effector)
+    if e1 is None:
+        return None
+    _vel_q[:] = float(th1), float(th2)           # fresh anchor for velocity mode
+    _vel_n[0] = 0
+
+    first = traj.q is None
+    traj.set_target((th1, th2))                # track_arm() ramps towards it
+    if first or not smooth:                    # first pose jumps, like before
+        servo_right, servo_left = joint_to_servo(th1, th2)
+        FiveBar.set_pose(servo_right, servo_left)  # ID-1 = right, ID-2 = left
+    _elbows = e1, e2
+    return _elbows
+
+
+def track_arm(dt):
+    """Advance the joint trajectory one tick and send the setpoint if it moved."""
+    with _arm_lock:
+        if traj.settled:
+            return
+        th1, th2 = traj.step(dt)
+    FiveBar.set_pose(*joint_to_servo(th1, th2))
+
+
+# preallocated plot buffers: base1, elbow1, end effector, elbow2, base2
+_arm_x = np.array([base1[0], 0.0, 0.0, 0.0, base2[0]])
+_arm_y = np.array([base1[1], 0.0, 0.0, 0.0, base2[1]])
+_slider_xy = {}                   # marker → ([x], [y]) arrays
+
+# velocity mode: joint state integrated through dθ = J⁻¹·dp, re-solved by IK
+# every REANCHOR_TICKS so rounding cannot drift the pen off the arm
+REANCHOR_TICKS = 20
+_B1X, _B1Y, _B2X, _B2Y = map(float, (*base1, *base2))
+_vel_q = [math.nan, math.nan]
+_vel_n = [0]
+
+
+def _in_bounds(x, y):
+    return not (x < -2.5 or x > 2.5 or y < -2.5 or (x > 1 and y < -1.5))   # as inverse_kinematics
+
+
+def jog_velocity(vx, vy):
+    """Move end_effector by (vx, vy) using the Jacobian at the current joints.
+
+    Scalar math only; falls back to an IK anchor on the first call, every
+    REANCHOR_TICKS calls, and whenever the pose was set some other way.
+    """
+    global _elbows
+    x, y = float(end_effector[0]), float(end_effector[1])
+    nx, ny = x + vx, y + vy
+    if not _in_bounds(nx, ny):
+        return False
+    if _vel_n[0] >= REANCHOR_TICKS or math.isnan(_vel_q[0]):
+        e1, e2, th1, th2 = solve_ik(nx, ny)
+        if e1 is None:
+            return False
+        th1, th2 = float(th1), float(th2)
+        n = 0
+    else:
+        th1, th2 = _vel_q
+        c1, s1, c2, s2 = math.cos(th1), math.sin(th1), math.cos(th2), math.sin(th2)
+        w1x, w1y = x - (_B1X + L1 * c1), y - (_B1Y + L1 * s1)
+        w2x, w2y = x - (_B2X + L1 * c2), y - (_B2Y + L1 * s2)
+        d1 = L1 * (w1y * c1 - w1x * s1)
+        d2 = L1 * (w2y * c2 - w2x * s2)
+        if d1 == 0.0 or d2 == 0.0:                 # singular
+            return False
+        th1 += (w1x * vx + w1y * vy) / d1
+        th2 += (w2x * vx + w2y * vy) / d2
+        if not (JOINT_LO[0] <= th1 <= JOINT_HI[0] and JOINT_LO[1] <= th2 <= JOINT_HI[1]):
+            return False
+        e1 = (_B1X + L1 * math.cos(th1), _B1Y + L1 * math.sin(th1))
+        e2 = (_B2X + L1 * math.cos(th2), _B2Y + L1 * math.sin(th2))
+        n = _vel_n[0] + 1
+
+    end_effector[:] = (nx, ny)
+    _vel_q[:] = th1, th2
+    _vel_n[0] = n
+    first = traj.q is None
+    traj.set_target((th1, th2))
+    if first or not smooth:
+        FiveBar.set_pose(*joint_to_servo(th1, th2))
+    _elbows = e1, e2
+    return True
+
+
+def draw_arm(e1, e2, ee):
+    _arm_x[1], _arm_x[2], _arm_x[3] = e1[0], ee[0], e2[0]
+    _arm_y[1], _arm_y[2], _arm_y[3] = e1[1], ee[1], e2[1]
+    link_lines.setData(_arm_x, _arm_y)
+
+
+def update_plot():
+    with _arm_lock:
+        elbows = drive_arm()
+        ee = tuple(end_effector.tolist())
+    if elbows is None or headless:
+        return
+
+    # draw links
+    draw_arm(*elbows, ee)
+    _drawn["elbows"] = elbows
+
+
+
+
+
+def set_slider(marker, x_fixed, norm):
+    """norm ∈ [0,1] → marker at x_fixed, y between Y_MIN and Y_MAX."""
+    xy = _slider_xy.get(marker)
+    if xy is None:
+        xy = _slider_xy[marker] = (np.array([x_fixed], float), np.empty(1))
+    xy[1][0] = Y_MIN + norm * (Y_MAX - Y_MIN)
+    marker.setData(*xy)
+
+
+TICK_S     = 0.05   # period the jog / rail steps were tuned for
+CONTROL_HZ = 100    # default rate of the control thread
+RENDER_FPS = 30     # GUI redraw cap, independent of the control rate
+
+# jog speed scale per grid node: full stick (JOG_STEP per TICK_S) may not turn
+# any joint faster than JOG_QDOT_MAX; nodes the IK rejects get JOG_SCALE_EDGE
+JOG_STEP       = 0.05
+JOG_QDOT_MAX   = JOINT_VMAX       # rad/s, so the trajectory stage never lags the jog
+JOG_SCALE_EDGE = 0.25
+with np.errstate(divide="ignore", invalid="ignore"):
+    jog_scale_map = np.minimum(1.0, JOG_QDOT_MAX * TICK_S / (ik_table.gain * JOG_STEP))
+jog_scale_map = np.where(np.isfinite(jog_scale_map), jog_scale_map, JOG_SCALE_EDGE)
+
+
+def jog_scale(x, y):
+    ij = ik_table.nearest(x, y)
+    return JOG_SCALE_EDGE if ij is None else jog_scale_map[ij]
+
+
+_arm_lock    = threading.Lock()   # end_effector is shared with keyPressEvent
+traj         = trajectory.JointTrajectory((JOINT_VMAX,) * 2, (JOINT_AMAX,) * 2, JOINT_LO, JOINT_HI)
+_last_grip   = None
+_elbows      = None
+
+def control_step(dt=TICK_S):
+    """One input → IK → motor tick, no Qt calls.
+
+    Returns a snapshot dict for the GUI, or None when ◯ asks to quit.
+    """
+    global _last_grip
+    pad = controller.poll()
+    ax  = pad["axes"]
+    scale = dt / TICK_S
+
+
+    if pad["state"].get("back"):
+
+        #try: Rail.home()
+        #except Exception:pass
+        return None
+
+
+    dx, dy = ax["rx"], ax["ry"]
+    if abs(dx) > DEADZONE or abs(dy) > DEADZONE:
+        with _arm_lock:
+            step = JOG_STEP * scale * jog_scale(end_effector[0], end_effector[1])
+            if velocity:
+                jog_velocity(step * dx, -step * dy)
+            else:
+                nx = end_effector[0] + step * dx
+                ny = end_effector[1] - step * dy
+                if is_within_workspace(nx, ny):
+                    end_effector[:] = (nx, ny)
+                    drive_arm()
+
+    if smooth:
+        track_arm(dt)
+
+
+    rail_axis = -ax["ly"]
+    if abs(rail_axis) < DEADZONE:
+        rail_axis = 0.0
+
+    Rail.nudge(rail_axis * scale)
+
+
+    lt_raw = ax["lt"]
+    lt_norm = (lt_raw + 1.0) * 0.5
+
+
+    if lt_norm < DEADZONE:
+        lt_norm = 0.0
+
+
+
+
+    # motors.command drops repeats / deadband changes and rate-limits the bus
+    Gripper.set_ratio(lt_norm)
+    _last_grip = lt_norm
+
+    motors.flush()
+
+    with _arm_lock:
+        ee, elbows = tuple(end_effector.tolist()), _elbows
+        target = tuple(traj.target) if traj.target is not None else None
+        setpoint = tuple(traj.q) if traj.q is not None else None
+    return {
+        "end_effector": ee,
+        "elbows": elbows,
+        "rail": Rail.get_norm(),
+        "grip": _last_grip,
+        # measured, from the LSS feedback cache (None until the first fresh reading)
+        "rail_present": Rail.present_norm(),
+        "grip_present": Gripper.present_ratio(),
+        # for the flight recorder
+        "axes": ax,
+        "target": target,
+        "setpoint": setpoint,
+        "servo": joint_to_servo(*setpoint) if setpoint is not None else None,
+    }
+
+
+def reset():
+    """Back to the start-of-game state without re-importing anything."""
+    global _last_grip, _elbows
+    with _arm_lock:
+        end_effector[:] = HOME
+        _elbows = None
+        _vel_q[:] = math.nan, math.nan
+        traj.reset()
+    _last_grip = None
+    _drawn.clear()
+    update_plot()
+
+
+_drawn = {}                       # what the plot shows now
+_frames = {"t": -1e9, "drawn": 0, "skipped": 0, "items": 0}
+_frame_s = 1.0 / RENDER_FPS
+
+def render(snap, now=None):
+    """Draw a control_step snapshot, skipping parts that did not change.
+
+    At most one frame per _frame_s; a skipped snapshot is caught up by the
+    next call since only what differs from _drawn is pushed. True if drawn.
+    The sliders show the measured rail/gripper position when there is a
+    fresh one, else the commanded value.
+    """
+    now = time.perf_counter() if now is None else now
+    if now - _frames["t"] < _frame_s:
+        _frames["skipped"] += 1
+        return False
+    _frames["t"] = now
+    n = 0
+    if snap["elbows"] is not None and snap["elbows"] is not _drawn.get("elbows"):  # new tuple per IK solve
+        draw_arm(*snap["elbows"], snap["end_effector"])
+        _drawn["elbows"] = snap["elbows"]
+        n += 1
+    rail = snap["rail_present"] if snap.get("rail_present") is not None else snap["rail"]
+    if rail != _drawn.get("rail"):
+        set_slider(rail_marker, X_RAIL, rail)
+        _drawn["rail"] = rail
+        n += 1
+    grip = snap["grip_present"] if snap.get("grip_present") is not None else snap["grip"]
+    if grip is not None and grip != _drawn.get("grip"):
+        set_slider(gripper_marker, X_GRIPPER, grip)
+        _drawn["grip"] = grip
+        n += 1
+    _frames["drawn"] += n > 0
+    _frames["items"] += n
+    return n > 0
+
+
+def update_controller():
+    snap = control_step()
+    if snap is None:
+        if not headless:
+            QtWidgets.QApplication.instance().quit()
+        return False
+    if not headless:
+        render(snap)
+    return True
+
+
+class ControlLoop:
+    """Runs step(dt) on its own thread at a fixed rate.
+
+    Deadlines are absolute (start + k·period) so the period does not drift with
+    the work time; a tick that runs past the next deadline counts as an overrun
+    and the schedule skips ahead instead of bursting. The latest snapshot
+    returned by step is left in .snapshot for the GUI to pick up, and handed to
+    `recorder` (a flight_recorder.Recorder) if one is given.
+    """
+
+    def __init__(self, step, rate_hz=CONTROL_HZ, history=2000, recorder=None):
+        self.step = step
+        self.recorder = recorder
+        self.period = 1.0 / rate_hz
+        self.snapshot = None
+        self.quit_requested = False
+        self.ticks = self.overruns = 0
+        self._late = collections.deque(maxlen=history)   # start - deadline (s)
+        self._work = collections.deque(maxlen=history)   # step duration (s)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="control", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _run(self):
+        rec = self.recorder
+        if rec is not None:
+            rec.begin()
+        nxt = time.perf_counter()
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if nxt > now and self._stop.wait(nxt - now):
+                break
+            start = time.perf_counter()
+            try:
+                snap = self.step(self.period)
+            except Exception:
+                traceback.print_exc()
+                snap = None
+            end = time.perf_counter()
+
+            self._late.append(start - nxt)
+            self._work.append(end - start)
+            self.ticks += 1
+            if snap is None:
+                self.quit_requested = True
+                break
+            self.snapshot = snap
+            if rec is not None:
+                rec.record(snap, start - nxt, end - start, self.period)
+
+            nxt += self.period
+            if end > nxt:                               # missed the next slot
+                self.overruns += 1
+                nxt += ((end - nxt) // self.period + 1) * self.period
+
+    def stats(self):
+        late = np.asarray(self._late) * 1e3
+        work = np.asarray(self._work) * 1e3
+        out = {"rate_hz": 1.0 / self.period, "ticks": self.ticks, "overruns": self.overruns}
+        if late.size:
+            out.update(
+                jitter_mean_ms=float(late.mean()),
+                jitter_p99_ms=float(np.percentile(late, 99)),
+                jitter_max_ms=float(late.max()),
+                work_p99_ms=float(np.percentile(work, 99)),
+                work_max_ms=float(work.max()),
+            )
+        return out
+
+
+
+
+
+# keyboard fallback
+
+def keyPressEvent(ev):
+    step = 0.05
+    if ev.key() == QtCore.Qt.Key_Escape:
+        QtWidgets.QApplication.instance().quit(); return
+    m = {QtCore.Qt.Key_Up:(0, step), QtCore.Qt.Key_Down:(0,-step),
+         QtCore.Qt.Key_Left:(-step,0), QtCore.Qt.Key_Right:(step,0)}
+    if ev.key() in m:
+        with _arm_lock:
+            nx = end_effector[0] + m[ev.key()][0]
+            ny = end_effector[1] + m[ev.key()][1]
+            ok = is_within_workspace(nx, ny)
+            if ok:
+                end_effector[:] = (nx, ny)
+        if ok:
+            update_plot()
+
+
+def _arg(name, default):
+    if name in sys.argv[:-1]:
+        return type(default)(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def _report(loop):
+    st = loop.stats()
+    print("[control] " + ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+                                   for k, v in st.items()), file=sys.stderr)
+    if controller._net is not None:
+        print("[net] " + ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+                                   for k, v in controller._net.stats().items()), file=sys.stderr)
+    if not headless:
+        print(f"[render] fps_cap={1 / _frame_s:.0f}, frames={_frames['drawn']}, "
+              f"items={_frames['items']}, skipped={_frames['skipped']}", file=sys.stderr)
+
+
+
+def run_attached(fps):
+    """Free-roam over a robot_server session: the daemon drives, we only draw.
+
+    Ends with the session (◯ on the pad) or Esc, which stops it.
+    """
+    import robot_server
+    robot_server.ensure_server()
+    rep = robot_server.request("start")
+    if not rep.get("ok"):
+        print("[attach] session not started:", rep.get("error"), file=sys.stderr)
+        return
+    qapp = QtWidgets.QApplication.instance()
+    win.keyPressEvent = lambda ev: qapp.quit() if ev.key() == QtCore.Qt.Key_Escape else None
+    last = {}
+
+    def _tick():
+        try:
+            st = robot_server.request("status", timeout=1.0)
+        except (OSError, ValueError) as exc:
+            print("[attach] lost the robot server:", exc, file=sys.stderr)
+            qapp.quit(); return
+        snap = st.get("snapshot")
+        if st.get("session") != "running":
+            qapp.quit()
+        elif snap is not None:
+            if snap["elbows"] == last.get("elbows"):    # JSON gives a new list every time
+                snap["elbows"] = last["elbows"]
+            last["elbows"] = snap["elbows"]
+            render(snap)
+
+    t = QtCore.QTimer(); t.timeout.connect(_tick); t.start(max(1, int(1000 / fps)))
+    qapp.exec()
+    try:
+        robot_server.request("stop")
+    except OSError:
+        pass
+
+
+if __name__ == '__main__' and attach:
+    _frame_s = 1.0 / _arg("--fps", float(RENDER_FPS))
+    run_attached(1.0 / _frame_s)
+elif __name__ == '__main__':
+    startup.report()
+    import flight_recorder
+    rec = flight_recorder.open_default()
+    loop = ControlLoop(control_step, _arg("--rate", float(CONTROL_HZ)), recorder=rec)
+    if not headless:
+        fps = _arg("--fps", float(RENDER_FPS))
+        _frame_s = 1.0 / fps
+        win.keyPressEvent = keyPressEvent
+        update_plot()
+
+        def _gui_tick():
+            if loop.quit_requested or not loop.is_alive():
+                QtWidgets.QApplication.instance().quit()
+            elif loop.snapshot is not None:
+                render(loop.snapshot)
+
+        loop.start()
+        t = QtCore.QTimer(); t.timeout.connect(_gui_tick); t.start(max(1, int(500 / fps)))   # poll at 2× the cap
+        QtWidgets.QApplication.instance().exec()
+        loop.stop()
+        _report(loop)
+        torque_off()
+        if rec is not None:
+            rec.close()
+    else:
+        loop.start()
+        try:
+            while loop.is_alive():
+                loop.join(0.5)
+        except KeyboardInterrupt:
+            pass
+        loop.stop()
+        _report(loop)
+        controller.close()
+        if rec is not None:
+            rec.close()
@@ -1,175 +1,194 @@
-import os
-import platform
-import random
-import subprocess
-import sys
-import traceback
-
-try:
-    import RPi.GPIO as GPIO
-    ON_PI = True
-except (ImportError, RuntimeError):
-    ON_PI = False
-
-    class _DummyGPIO:
-        BCM = IN = PUD_UP = BOTH = None
-
-        def setmode(self, *_):
-            pass
-
-        def setup(self, *_):
-            pass
-
-        def input(self, *_):
-            return 1
-
-        def add_event_detect(self, *_ , **__):
-            pass
-
-        def cleanup(self):
-            pass
-
-    GPIO = _DummyGPIO()
-
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal
-from PyQt5.QtGui import QMovie
-from PyQt5.QtWidgets import QApplication, QLabel, QPushButton, QVBoxLayout, QWidget
-
-import controller
-
-BEAM_PIN = 17           # BCM numbering; beam‑break pulls the pin *LOW*
-GAME_TIME = 60          # seconds
-QUICK_QUIT_MS = 10      # poll period for ⃝ / back button
-GIF_DURATION_MS = 2500  # how long each celebratory GIF shows
-
-class Scoreboard(QWidget):
-
-    beam_tripped = pyqtSignal()
-
-    def __init__(self, gif_folder: str):
-        super().__init__()
-        self.setWindowTitle("Scoreboard")
-        self.gif_folder = gif_folder
-
-        self.score = 0
-        self.time_left = GAME_TIME
-        self._movie: QMovie | None = None
-        self.robot_process: subprocess.Popen[str] | None = None
-
-        self.timer_label = QLabel(f"Time Left: {GAME_TIME}")
-        self.timer_label.setStyleSheet("font-size: 28px;")
-        self.score_label = QLabel("Score: 0")
-        self.score_label.setStyleSheet("font-size: 36px; font-weight: bold;")
-        self.gif_label = QLabel()
-        self.gif_label.setVisible(False)
-        self.continue_button = QPushButton("Continue")
-        self.continue_button.setVisible(False)
-        self.continue_button.clicked.connect(self.cleanup_and_exit)
-
-        lay = QVBoxLayout()
-        for w in (self.timer_label, self.score_label, self.gif_label, self.continue_button):
-            lay.addWidget(w, alignment=Qt.AlignCenter)
-        self.setLayout(lay)
-
-        quit_timer = QTimer(self)
-        quit_timer.timeout.connect(
-            lambda: self.cleanup_and_exit()
-            if controller.poll()["state"]["back"]
-            else None,
-        )
-        quit_timer.start(QUICK_QUIT_MS)
-
-        pycmd = "python3" if platform.system() != "Windows" else "python"
-        try:
-            self.robot_process = subprocess.Popen([pycmd, "game_logic.py", "--headless"])
-        except Exception as exc:  # noqa: BLE001
-            print("❌ Failed to launch robot:", exc)
-
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self._update_timer)
-        self.timer.start(1000)
-
-        if ON_PI:
-            GPIO.setmode(GPIO.BCM)
-            GPIO.setup(BEAM_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-
-            def _beam_callback(channel: int):
-                self.beam_tripped.emit()
-
-            GPIO.add_event_detect(
-                BEAM_PIN,
-                GPIO.BOTH,
-                callback=_beam_callback,
-                bouncetime=120,
-            )
-        else:
-            print("⚠️  GPIO stub active — scoring only via <space> key")
-
-        self.beam_tripped.connect(self.register_goal)
-
-    def keyPressEvent(self, event):
-        if event.key() == Qt.Key_Space:
-            self.register_goal()
-        elif event.key() == Qt.Key_Escape:
-            self.cleanup_and_exit()
-
-    def register_goal(self):
-
-        if self.time_left <= 0:
-            return
-        self.score += 1
-        self.score_label.setText(f"Score: {self.score}")
-        self._show_random_gif()
-
-    def _show_random_gif(self):
-        gifs = [f for f in os.listdir(self.gif_folder) if f.lower().endswith(".gif")]
-        if not gifs:
-            return
-        chosen = os.path.join(self.gif_folder, random.choice(gifs))
-        self._movie = QMovie(chosen)
-        self.gif_label.setMovie(self._movie)
-        self.gif_label.setVisible(True)
-        self._movie.start()
-        QTimer.singleShot(GIF_DURATION_MS, self._hide_gif)
-
-    def _hide_gif(self):
-        if self._movie:
-            self._movie.stop()
-        self.gif_label.setVisible(False)
-
-    def _update_timer(self):
-        self.time_left -= 1
-        if self.time_left <= 10:
-            self.timer_label.setStyleSheet("font-size: 28px; color: red;")
-        if self.time_left > 0:
-            self.timer_label.setText(f"Time Left: {self.time_left}")
-        else:
-            self.timer_label.setText("Time's up!")
-            self.timer.stop()
-            self.continue_button.setVisible(True)
-
-    def cleanup_and_exit(self):
-        try:
-            if ON_PI:
-                GPIO.cleanup()
-        except Exception:
-            traceback.print_exc()
-        if self.robot_process:
-            self.robot_process.terminate()
-        print(self.score, flush=True)
-        QApplication.instance().quit()
-        sys.exit(0)
-
-
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    if os.path.exists("theme.qss"):
-        with open("theme.qss", "r", encoding="utf-8") as f:
-            app.setStyleSheet(f.read())
-
-    gif_path = r"E:\30_april\goal gifs" # remember
-
-    scoreboard = Scoreboard(gif_folder=gif_path)
-    scoreboard.showFullScreen()
-
-    sys.exit(app.exec_())
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QMovie
+from PyQt5.QtWidgets import QApplication, QLabel, QPushButton, QVBoxLayout, QWidget
+
+import assets
+import beam
+import controller_qt
+import robot_server
+
+BEAM_PIN = 17           # BCM numbering; beam‑break pulls the pin *LOW*
+GAME_TIME = 60          # seconds
+GIF_DURATION_MS = 2500  # how long each celebratory GIF shows
+BEAM_DRAIN_MS = 5       # how often the UI collects captured goals
+ROBOT_WAIT_S = 20       # how long a cold robot server may take to answer
+ROBOT_RETRY_MS = 100    # how often we ask it to start the session until then
+
+class Scoreboard(QWidget):
+
+    def __init__(self, gif_folder: str):
+        super().__init__()
+        self.setWindowTitle("Scoreboard")
+        self.gif_folder = gif_folder
+
+        self.score = 0
+        self.time_left = GAME_TIME
+        self._movie: QMovie | None = None
+
+        self.timer_label = QLabel(f"Time Left: {GAME_TIME}")
+        self.timer_label.setStyleSheet("font-size: 28px;")
+        self.score_label = QLabel("Score: 0")
+        self.score_label.setStyleSheet("font-size: 36px; font-weight: bold;")
+        self.gif_label = QLabel()
+        self.gif_label.setVisible(False)
+        self.gif_player = assets.GifPlayer(self.gif_label)
+        self.gif_timer = QTimer(self)                  # restarts on every goal
+        self.gif_timer.setSingleShot(True)
+        self.gif_timer.timeout.connect(self._hide_gif)
+        # decode the celebrations now, while nobody has scored yet
+        self.assets = assets.cache()
+        self.gifs = self.assets.preload_gifs(gif_folder, max_ms=GIF_DURATION_MS)
+        self.continue_button = QPushButton("Continue")
+        self.continue_button.setVisible(False)
+        self.continue_button.clicked.connect(self.cleanup_and_exit)
+
+        lay = QVBoxLayout()
+        for w in (self.timer_label, self.score_label, self.gif_label, self.continue_button):
+            lay.addWidget(w, alignment=Qt.AlignCenter)
+        self.setLayout(lay)
+
+        controller_qt.bridge().pressed.connect(
+            lambda btn: self.cleanup_and_exit() if btn == "back" else None
+        )
+
+        # stdout carries the score back to main_menu, so robot chatter goes to stderr
+        try:
+            robot_server.ensure_server(wait=False)      # a cold start must not freeze the UI
+        except Exception as exc:  # noqa: BLE001
+            print("❌ Failed to launch robot:", exc, file=sys.stderr)
+        self._robot_deadline = time.monotonic() + ROBOT_WAIT_S
+        self.robot_timer = QTimer(self)                # starts the session once the server answers
+        self.robot_timer.timeout.connect(self._start_robot)
+        self.robot_timer.start(ROBOT_RETRY_MS)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._update_timer)
+        self.timer.start(1000)
+
+        # edges are stamped and queued by the GPIO callback; we only drain here
+        self.beam = beam.open_beam(BEAM_PIN)
+        self.latency = beam.Latency()
+        self._sim_stop = threading.Event()
+        if isinstance(self.beam, beam.SimulatedBeam):
+            print("⚠️  simulated beam — <space> drops a ball", file=sys.stderr)
+            rate = float(os.environ.get("FIVELINK_BEAM_SIM_RATE", "0"))   # goals/min
+            if rate > 0:
+                self.beam.rain(rate, self._sim_stop)
+        self.beam_timer = QTimer(self)
+        self.beam_timer.setTimerType(Qt.PreciseTimer)
+        self.beam_timer.timeout.connect(self._drain_beam)
+        self.beam_timer.start(BEAM_DRAIN_MS)
+
+    def _start_robot(self):
+        try:
+            rep = robot_server.request("start")
+        except OSError as exc:
+            if time.monotonic() < self._robot_deadline:
+                return                                 # still warming up, try again
+            print("❌ Failed to launch robot:", exc, file=sys.stderr)
+        else:
+            if not rep.get("ok"):
+                print("❌ Robot session not started:", rep.get("error"), file=sys.stderr)
+        self.robot_timer.stop()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Space:
+            if isinstance(self.beam, beam.SimulatedBeam):
+                self.beam.pulse()              # through the same capture path
+            else:
+                self.register_goal()
+        elif event.key() == Qt.Key_Escape:
+            self.cleanup_and_exit()
+
+    def _drain_beam(self):
+        goals = self.beam.drain()
+        if goals:
+            self.register_goal(goals)
+
+    def register_goal(self, captured=None):
+        """Count a batch of goals (capture times in ns) with one repaint and one GIF."""
+        if self.time_left <= 0:
+            return
+        captured = captured or [time.monotonic_ns()]
+        self.score += len(captured)
+        self.score_label.setText(f"Score: {self.score}")
+        self.score_label.repaint()
+        shown = time.monotonic_ns()
+        for t in captured:
+            self.latency.add(t, shown)
+        self._show_random_gif()
+
+    def _show_random_gif(self):
+        self._stop_gif()
+        ready = self.assets.ready_gifs(max_ms=GIF_DURATION_MS)
+        gif = self.assets.gif(random.choice(ready), max_ms=GIF_DURATION_MS) if ready else None
+        if gif is not None:
+            self.gif_player.play(gif)
+        elif self.gifs:                                # nothing decoded yet: old path
+            self._movie = QMovie(random.choice(self.gifs))
+            self.gif_label.setMovie(self._movie)
+            self._movie.start()
+        else:
+            return
+        self.gif_label.setVisible(True)
+        self.gif_timer.start(GIF_DURATION_MS)
+
+    def _stop_gif(self):
+        self.gif_player.stop()
+        if self._movie:
+            self._movie.stop()
+            self._movie = None
+
+    def _hide_gif(self):
+        self._stop_gif()
+        self.gif_label.setVisible(False)
+
+    def _update_timer(self):
+        self.time_left -= 1
+        if self.time_left <= 10:
+            self.timer_label.setStyleSheet("font-size: 28px; color: red;")
+        if self.time_left > 0:
+            self.timer_label.setText(f"Time Left: {self.time_left}")
+        else:
+            self.timer_label.setText("Time's up!")
+            self.timer.stop()
+            self.continue_button.setVisible(True)
+
+    def cleanup_and_exit(self):
+        self._sim_stop.set()
+        self.robot_timer.stop()
+        try:
+            self.beam.close()
+        except Exception:
+            traceback.print_exc()
+        print(f"[beam] {self.beam.stats()}, capture→display {self.latency.summary()}", file=sys.stderr)
+        try:
+            robot_server.request("stop", timeout=1.0)
+        except OSError:
+            pass
+        print(self.score, flush=True)
+        QApplication.instance().quit()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    if os.path.exists("theme.qss"):
+        with open("theme.qss", "r", encoding="utf-8") as f:
+            app.setStyleSheet(f.read())
+
+    gif_path = r"E:\30_april\goal gifs" # remember
+    if not os.path.isdir(gif_path):
+        gif_path = "goal gifs"              # the copy shipped next to this script
+
+    scoreboard = Scoreboard(gif_folder=gif_path)
+    scoreboard.showFullScreen()
+
+    sys.exit(app.exec_())
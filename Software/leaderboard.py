@@ -0,0 +1,156 @@
+"""Score history in SQLite: every game is kept, top-N and per-initials queries.
+
+Writes go through a background thread with its own connection, so the menu
+never waits on the disk. Until a write has committed it is still visible to
+top()/best() from an in-memory pending list. The database runs in WAL mode,
+so reads do not block behind a commit.
+
+An existing scores.json (the old top-10 file) is imported once and renamed
+to scores.json.migrated.
+"""
+import json, os, queue, sqlite3, sys, threading, time
+
+DB_FILE   = "scores.db"
+JSON_FILE = "scores.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id       INTEGER PRIMARY KEY,
+    initials TEXT    NOT NULL,
+    score    INTEGER NOT NULL,
+    ts       REAL                -- unix time, NULL for migrated rows
+);
+CREATE INDEX IF NOT EXISTS scores_top      ON scores (score DESC, ts);
+CREATE INDEX IF NOT EXISTS scores_initials ON scores (initials, score DESC);
+"""
+_COLS = ("initials", "score", "ts")
+
+
+def _connect(path):
+    db = sqlite3.connect(path, timeout=5.0)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+class Leaderboard:
+    def __init__(self, path=DB_FILE, json_file=JSON_FILE):
+        self.path = path
+        self._db = _connect(path)                 # reads, on the caller's thread
+        self._db.executescript(_SCHEMA)
+        self._migrate(json_file)
+        self._pending = []                        # (initials, score, ts) not yet committed
+        self._lock = threading.Lock()
+        self._q = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="leaderboard", daemon=True)
+        self._writer.start()
+
+    def _migrate(self, json_file):
+        if not json_file or not os.path.exists(json_file):
+            return
+        try:
+            with open(json_file, encoding="utf-8") as f:
+                rows = [(str(e["initials"]), int(e["score"]), None) for e in json.load(f)]
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            print(f"[scores] not migrating {json_file}:", exc, file=sys.stderr)
+            return
+        with self._db:
+            self._db.executemany("INSERT INTO scores (initials, score, ts) VALUES (?, ?, ?)", rows)
+        os.replace(json_file, json_file + ".migrated")
+        print(f"[scores] migrated {len(rows)} scores from {json_file}", file=sys.stderr)
+
+    # writes
+
+    def add(self, initials, score, ts=None):
+        """Queue a score; returns at once. top()/best() include it immediately."""
+        row = (initials, int(score), time.time() if ts is None else ts)
+        with self._lock:
+            self._pending.append(row)
+        self._q.put(row)
+
+    def _write_loop(self):
+        db = _connect(self.path)
+        while True:
+            row = self._q.get()
+            if row is None:
+                break
+            batch = [row]
+            while True:                           # commit whatever piled up together
+                try:
+                    nxt = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._q.put(None)
+                    break
+                batch.append(nxt)
+            try:
+                with db:
+                    db.executemany("INSERT INTO scores (initials, score, ts) VALUES (?, ?, ?)", batch)
+            except sqlite3.Error as exc:
+                print("[scores] write failed:", exc, file=sys.stderr)   # stays in _pending
+            else:
+                with self._lock:
+                    for r in batch:
+                        self._pending.remove(r)
+            for _ in batch:
+                self._q.task_done()
+        db.close()
+
+    def flush(self):
+        """Block until every queued score is committed (or has failed)."""
+        self._q.join()
+
+    def close(self):
+        self._q.put(None)
+        self._writer.join(5.0)
+        self._db.close()
+
+    # reads
+
+    def _query(self, sql, args, pending_ok, order_key, n):
+        rows = self._db.execute(sql, args).fetchall()
+        with self._lock:
+            extra = [r for r in self._pending if pending_ok(r) and r not in rows]  # may have just landed
+        if extra:
+            rows = sorted(rows + extra, key=order_key)[:n]
+        return [dict(zip(_COLS, r)) for r in rows]
+
+    def top(self, n=10):
+        """Best n scores of all time, ties broken by who got there first."""
+        return self._query(
+            "SELECT initials, score, ts FROM scores ORDER BY score DESC, ts LIMIT ?", (n,),
+            lambda r: True, lambda r: (-r[1], r[2] or 0.0), n)
+
+    def best(self, initials, n=10):
+        """Best n scores for one set of initials."""
+        return self._query(
+            "SELECT initials, score, ts FROM scores WHERE initials = ? ORDER BY score DESC, ts LIMIT ?",
+            (initials, n), lambda r: r[0] == initials, lambda r: (-r[1], r[2] or 0.0), n)
+
+    def history(self, initials=None, n=100):
+        """Most recent n games, optionally for one set of initials."""
+        where, args = ("WHERE initials = ?", (initials, n)) if initials else ("", (n,))
+        return self._query(
+            f"SELECT initials, score, ts FROM scores {where} ORDER BY ts DESC LIMIT ?", args,
+            lambda r: initials is None or r[0] == initials, lambda r: -(r[2] or 0.0), n)
+
+    def count(self):
+        with self._lock:
+            pending = len(self._pending)
+        return self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0] + pending
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--db", default=DB_FILE)
+    ap.add_argument("--initials")
+    ap.add_argument("-n", type=int, default=10)
+    args = ap.parse_args()
+    board = Leaderboard(args.db)
+    rows = board.best(args.initials, args.n) if args.initials else board.top(args.n)
+    for i, e in enumerate(rows, 1):
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(e["ts"])) if e["ts"] else "-"
+        print(f"#{i:<3} {e['initials']}  {e['score']:4d}  {when}")
+    board.close()
@@ -1,26 +1,120 @@
-
-import importlib, sys
-from .stub import FiveBar, Rail, Gripper   # defaults
-
-# Dynamixel
-try:
-    importlib.import_module("dynamixel_sdk")
-    from .dxl import FiveBar
-    print("[motors] Dynamixel live")
-except Exception as e:
-    print("[motors] no Dynamixel → stub:", e, file=sys.stderr)
-
-
-# HS-1
-try:
-    from .hs1 import Rail, Gripper
-    print("[motors] HS-1 live")
-except Exception as e:
-    from .stub import Rail, Gripper
-    print("[motors] no HS-1 → stub:", e, file=sys.stderr)
-
-
-def torque_off():
-    FiveBar.torque_off()
-    Rail.torque_off()
-    Gripper.torque_off()
+"""Motor backends, picked by select() instead of at import time.
+
+FiveBar / Rail / Gripper are proxies: the first attribute access connects the
+chosen backend if select() has not run yet, so importing this package never
+opens a serial port.
+
+FIVELINK_MOTORS: auto (live if it connects, else sim) | live | sim
+("stub" is accepted for sim). See motors.sim for the simulation knobs.
+FIVELINK_IO_WORKERS=0 keeps bus writes on the calling thread.
+FIVELINK_LSS_FEEDBACK_HZ polls rail/gripper positions in the background
+(default 10, 0 = off) for Rail.present() & co; FIVELINK_LSS_CURRENT=1 adds
+their currents.
+"""
+import importlib, os, sys, time
+
+from . import command, feedback
+
+def _backend(name):
+    return "sim" if name == "stub" else name
+
+
+BACKEND = _backend(os.environ.get("FIVELINK_MOTORS", "auto"))
+IO_WORKERS = os.environ.get("FIVELINK_IO_WORKERS", "1") != "0"
+FEEDBACK_HZ = float(os.environ.get("FIVELINK_LSS_FEEDBACK_HZ", "10"))
+FEEDBACK_CURRENT = os.environ.get("FIVELINK_LSS_CURRENT", "0") != "0"
+
+_LIVE = {                      # bus → (module, label)
+    "dxl": (".dxl", "Dynamixel"),
+    "lss": (".hs1", "HS-1"),
+}
+_mods = {}                     # bus → connected module (live or sim)
+timings = {}                   # bus → seconds spent connecting
+
+
+def _connect(bus):
+    mod = _mods.get(bus)
+    if mod is not None:
+        return mod
+    t0 = time.perf_counter()
+    mod = None
+    if BACKEND != "sim":
+        name, label = _LIVE[bus]
+        try:
+            live = importlib.import_module(name, __name__)
+            live.connect()
+            mod = live
+            print(f"[motors] {label} live")
+        except Exception as e:
+            if BACKEND == "live":
+                raise
+            print(f"[motors] no {label} → sim:", e, file=sys.stderr)
+    else:
+        print(f"[motors] simulated {bus} bus", file=sys.stderr)
+    if mod is None:                    # imported on demand: its channels only exist if used
+        mod = importlib.import_module(".sim", __name__)
+    _mods[bus] = mod
+    if IO_WORKERS:                     # one writer thread per physical bus
+        command.bus(bus).start_worker()
+    if bus == "lss" and FEEDBACK_HZ > 0:
+        mod.start_feedback(FEEDBACK_HZ, FEEDBACK_CURRENT)
+    timings[bus] = time.perf_counter() - t0
+    return mod
+
+
+def select(backend=None):
+    """Choose the backend and connect every bus now."""
+    global BACKEND
+    if backend is not None:
+        if _mods and _backend(backend) != BACKEND:
+            raise RuntimeError("motors already connected with BACKEND=" + BACKEND)
+        BACKEND = _backend(backend)
+    for bus in _LIVE:
+        _connect(bus)
+    return dict(_mods)
+
+
+class _Lazy:
+    def __init__(self, bus, attr):
+        self._bus, self._attr = bus, attr
+
+    def __getattr__(self, name):
+        val = getattr(getattr(_connect(self._bus), self._attr), name)
+        if callable(val):
+            setattr(self, name, val)       # later calls skip the lookup
+        return val
+
+    def __repr__(self):
+        mod = _mods.get(self._bus)
+        return f"<motors.{self._attr} {mod.__name__ if mod else 'not connected'}>"
+
+
+FiveBar = _Lazy("dxl", "FiveBar")
+Rail    = _Lazy("lss", "Rail")
+Gripper = _Lazy("lss", "Gripper")
+
+
+def torque_on():
+    FiveBar.torque_on()
+    Rail.torque_on()
+    Gripper.torque_on()
+
+
+def torque_off():
+    # never connect a bus just to switch it off
+    if "dxl" in _mods:
+        FiveBar.torque_off()
+    if "lss" in _mods:
+        Rail.torque_off()
+        Gripper.torque_off()
+    command.drain()
+
+
+def flush():
+    """Send rate-limited commands that are now due; call once per control tick."""
+    command.flush()
+
+
+def bus_stats():
+    """Bytes/transactions per bus, sent/dropped/deferred per device, feedback polling."""
+    return {**command.stats(), "feedback": feedback.stats()}
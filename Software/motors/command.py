@@ -0,0 +1,251 @@
+"""Command coalescing and per-bus traffic accounting shared by all backends.
+
+Every device write goes through a Channel: the value is quantized to the
+device's native resolution, dropped if it would not change anything (or is
+inside the deadband), and held back if the device was written less than
+`min_interval` ago. A held value is latest-wins and goes out on the next
+offer() or flush() once the interval has passed. Each send is booked on its
+Bus as bytes out/in and transactions.
+
+With start_worker() a bus gets its own I/O thread: channels only post the
+value into a per-device slot (latest wins) and return, so a blocking round
+trip on one serial line no longer delays the other.
+"""
+import collections, math, sys, threading, time, traceback
+
+_buses = {}
+_channels = []
+
+
+class Bus:
+    def __init__(self, name):
+        self.name = name
+        self.tx_bytes = self.rx_bytes = self.transactions = 0
+        self.t0 = time.monotonic()
+        self.lock = threading.RLock()     # held for every transfer on this port
+        self.worker = None
+
+    def start_worker(self):
+        if self.worker is None:
+            self.worker = _Worker(self)
+            self.worker.start()
+        return self.worker
+
+    def account(self, tx, rx=0, n=1):
+        self.tx_bytes += tx
+        self.rx_bytes += rx
+        self.transactions += n
+
+    def stats(self):
+        dt = max(time.monotonic() - self.t0, 1e-9)
+        out = {
+            "tx_bytes": self.tx_bytes, "rx_bytes": self.rx_bytes,
+            "transactions": self.transactions,
+            "tx_Bps": self.tx_bytes / dt, "rx_Bps": self.rx_bytes / dt,
+            "tps": self.transactions / dt,
+        }
+        if self.worker is not None:
+            out.update(self.worker.stats())
+        return out
+
+
+def _pct(xs, p):
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+
+class _Worker(threading.Thread):
+    """One I/O thread per bus with a latest-value-wins slot per channel."""
+
+    def __init__(self, bus, history=1000):
+        super().__init__(name=f"io-{bus.name}", daemon=True)
+        self.bus = bus
+        self.slots = {}                   # channel → (value, posted_at)
+        self.cond = threading.Condition()
+        self.busy = False
+        self.replaced = self.errors = 0
+        self._queue = collections.deque(maxlen=history)   # post → send start (s)
+        self._send = collections.deque(maxlen=history)    # send duration (s)
+
+    def post(self, ch, q):
+        with self.cond:
+            if ch in self.slots:
+                self.replaced += 1        # overwritten before it reached the wire
+            self.slots[ch] = (q, time.perf_counter())
+            self.cond.notify()
+
+    def drain(self, timeout=1.0):
+        end = time.monotonic() + timeout
+        with self.cond:
+            while self.slots or self.busy:
+                left = end - time.monotonic()
+                if left <= 0:
+                    return False
+                self.cond.wait(left)
+        return True
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.slots:
+                    self.cond.wait()
+                batch, self.slots = self.slots, {}
+                self.busy = True
+            for ch, (q, posted) in batch.items():
+                t0 = time.perf_counter()
+                self._queue.append(t0 - posted)
+                try:
+                    ch._transmit(q)
+                except Exception:
+                    self.errors += 1
+                    traceback.print_exc(file=sys.stderr)
+                self._send.append(time.perf_counter() - t0)
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
+
+    def stats(self):
+        qs, ss = list(self._queue), list(self._send)
+        return {
+            "queue_p50_ms": _pct(qs, 50) * 1e3, "queue_p99_ms": _pct(qs, 99) * 1e3,
+            "queue_max_ms": max(qs, default=0.0) * 1e3,
+            "send_p50_ms": _pct(ss, 50) * 1e3, "send_p99_ms": _pct(ss, 99) * 1e3,
+            "replaced": self.replaced, "errors": self.errors, "backlog": len(self.slots),
+        }
+
+
+def bus(name):
+    b = _buses.get(name)
+    if b is None:
+        b = _buses[name] = Bus(name)
+    return b
+
+
+def _dist(a, b):
+    if isinstance(a, tuple):
+        return max(abs(x - y) for x, y in zip(a, b))
+    return abs(a - b)
+
+
+class Channel:
+    def __init__(self, bus_name, name, send, quantize=int, min_interval=0.0, deadband=0):
+        """send(q) writes the quantized value and returns (tx_bytes, rx_bytes, transactions)."""
+        self.bus = bus(bus_name)
+        self.name = name
+        self.send = send
+        self.quantize = quantize
+        self.min_interval = min_interval
+        self.deadband = deadband
+        self.last = None              # last value actually sent
+        self.last_t = -1e9
+        self.pending = None           # held back by the rate limit
+        self.sent = self.dropped = self.deferred = self.failed = 0
+        self._lock = threading.RLock()    # RLock: _transmit can fail under offer()
+        _channels.append(self)
+
+    def _send(self, q, now):
+        self.last, self.last_t, self.pending = q, now, None
+        if self.bus.worker is not None:
+            self.bus.worker.post(self, q)
+        else:
+            self._transmit(q)
+
+    def _transmit(self, q):
+        try:
+            with self.bus.lock:
+                self.bus.account(*self.send(q))
+        except Exception:
+            with self._lock:
+                self.failed += 1
+                if self.last == q:    # never reached the device: do not dedupe against it
+                    self.last = None
+            raise
+        self.sent += 1
+
+    def offer(self, value, force=False):
+        """Queue a new command. True if it was sent (or posted to the bus worker) now."""
+        q = self.quantize(value)
+        now = time.monotonic()
+        with self._lock:
+            if force:
+                self._send(q, now)
+                return True
+            if self.last is not None and _dist(q, self.last) <= self.deadband:
+                self.dropped += 1
+                self.pending = None   # newer value supersedes anything held back
+                return False
+            if now - self.last_t < self.min_interval:
+                if self.pending is not None:
+                    self.dropped += 1
+                self.pending = q
+                self.deferred += 1
+                return False
+            self._send(q, now)
+            return True
+
+    def flush(self):
+        with self._lock:
+            if self.pending is not None and time.monotonic() - self.last_t >= self.min_interval:
+                self._send(self.pending, time.monotonic())
+
+    def cancel(self):
+        """Drop a held-back or posted value that has not gone out yet (torque off)."""
+        with self._lock:
+            self.pending = None
+            w = self.bus.worker
+            if w is not None:
+                with w.cond:
+                    if w.slots.pop(self, None) is not None:
+                        self.last = None
+
+    def invalidate(self):
+        """Forget the last value, e.g. after a reconnect, so the next offer is sent."""
+        with self._lock:
+            self.last = None
+
+    def stats(self):
+        return {"bus": self.bus.name, "sent": self.sent, "dropped": self.dropped,
+                "deferred": self.deferred, "failed": self.failed, "last": self.last}
+
+
+def flush():
+    for ch in _channels:
+        if ch.pending is not None:
+            ch.flush()
+
+
+def drain(timeout=1.0):
+    """Wait until every worker has put its queued commands on the wire."""
+    ok = True
+    for b in list(_buses.values()):
+        if b.worker is not None:
+            ok &= b.worker.drain(timeout)
+    return ok
+
+
+def stats():
+    return {
+        "buses": {n: b.stats() for n, b in _buses.items()},
+        "channels": {c.name: c.stats() for c in _channels},
+    }
+
+
+def dxl_raw(rad):
+    """Servo angle (rad) → 12-bit Dynamixel goal position."""
+    return int((rad + math.pi) / (2*math.pi) * 4095) & 0x0FFF
+
+
+# wire sizes, for accounting
+
+DXL_STATUS = 11                               # Protocol 2.0 status, no params
+
+def dxl_write(data_len):
+    return 12 + data_len                      # hdr4 id len2 inst addr2 data crc2
+
+def dxl_sync_write(n_ids, data_len):
+    return 14 + n_ids * (1 + data_len)        # + start addr2, data len2
+
+def lss_cmd(dev_id, cmd, val=None):
+    return len(f"#{dev_id}{cmd}{'' if val is None else val}\r")
@@ -1,31 +1,109 @@
-import dynamixel_sdk as dxl, numpy as np
-
-DEV  = "/dev/ttyUSB0"
-BAUD = 57600
-ID1, ID2 = 1, 2
-
-ADDR_TORQUE_EN = 64
-ADDR_GOAL_POS  = 116
-
-ph = dxl.PortHandler(DEV)
-ph.openPort();  ph.setBaudRate(BAUD)
-pk = dxl.PacketHandler(2.0)
-
-for i in (ID1, ID2):
-    pk.write1ByteTxRx(ph, i, ADDR_TORQUE_EN, 1)
-
-def _rad_to_raw(rad: float) -> int:
-    return int((rad + np.pi) / (2*np.pi) * 4095) & 0x0FFF
-
-class FiveBar:
-    @staticmethod
-    def set_pose(t1_rad, t2_rad):
-
-        pk.write4ByteTxRx(ph, ID1, ADDR_GOAL_POS, _rad_to_raw(t1_rad))
-        pk.write4ByteTxRx(ph, ID2, ADDR_GOAL_POS, _rad_to_raw(t2_rad))
-
-    @staticmethod
-    def torque_off():
-        for i in (ID1, ID2):
-            pk.write1ByteTxRx(ph, i, ADDR_TORQUE_EN, 0)
-        ph.closePort()
+import os, sys
+import dynamixel_sdk as dxl, numpy as np
+from . import command
+
+DEV  = os.environ.get("FIVELINK_DXL_DEV", "/dev/ttyUSB0")     # per station, see stations.py
+BAUD = 57600
+ID1, ID2 = 1, 2
+
+ADDR_TORQUE_EN = 64
+ADDR_GOAL_POS  = 116
+LEN_GOAL_POS   = 4
+ADDR_PROFILE_ACC = 108
+ADDR_PROFILE_VEL = 112
+
+VEL_UNIT = 0.229   * 2*np.pi / 60      # rad/s  per Profile Velocity LSB
+ACC_UNIT = 214.577 * 2*np.pi / 3600    # rad/s² per Profile Acceleration LSB
+
+# one Sync Write packet for both IDs (no status reply); FIVELINK_DXL_SYNC=0 → per-ID TxRx
+SYNC_WRITE = os.environ.get("FIVELINK_DXL_SYNC", "1") != "0"
+POSE_MIN_S = 0.0               # min gap between goal-position writes (0 = every tick)
+
+_bus = command.bus("dxl")
+
+ph = pk = _sync = None          # set by connect()
+_sync_warned = False
+
+def connect():
+    """Open the port and enable torque; motors.select() calls this once."""
+    global ph, pk, _sync
+    ph = dxl.PortHandler(DEV)
+    if not (ph.openPort() and ph.setBaudRate(BAUD)):
+        raise OSError(f"cannot open {DEV}")
+    pk = dxl.PacketHandler(2.0)
+
+    _torque(1)
+
+    _sync = dxl.GroupSyncWrite(ph, pk, ADDR_GOAL_POS, LEN_GOAL_POS)
+    for i in (ID1, ID2):
+        _sync.addParam(i, [0] * LEN_GOAL_POS)
+
+def _le32(v: int) -> list:
+    return list(v.to_bytes(LEN_GOAL_POS, "little"))
+
+def _torque(on):
+    with _bus.lock:
+        for i in (ID1, ID2):
+            pk.write1ByteTxRx(ph, i, ADDR_TORQUE_EN, on)
+        _bus.account(2 * command.dxl_write(1), 2 * command.DXL_STATUS, 2)
+
+def _write_each(raw1, raw2):
+    pk.write4ByteTxRx(ph, ID1, ADDR_GOAL_POS, raw1)
+    pk.write4ByteTxRx(ph, ID2, ADDR_GOAL_POS, raw2)
+
+def _write_sync(raw1, raw2) -> bool:
+    global _sync_warned
+    _sync.changeParam(ID1, _le32(raw1))
+    _sync.changeParam(ID2, _le32(raw2))
+    res = _sync.txPacket()
+    if res == dxl.COMM_SUCCESS:
+        return True
+    if not _sync_warned:
+        print("[dxl] sync write failed → per-ID writes:", pk.getTxRxResult(res), file=sys.stderr)
+        _sync_warned = True
+    return False
+
+def _send_pose(raw):
+    if SYNC_WRITE and _write_sync(*raw):
+        return command.dxl_sync_write(2, LEN_GOAL_POS), 0, 1
+    _write_each(*raw)
+    return 2 * command.dxl_write(LEN_GOAL_POS), 2 * command.DXL_STATUS, 2
+
+# only goal positions that change a 12-bit raw value reach the bus
+_pose = command.Channel("dxl", "fivebar", _send_pose,
+                        quantize=lambda p: (command.dxl_raw(p[0]), command.dxl_raw(p[1])),
+                        min_interval=POSE_MIN_S)
+
+class FiveBar:
+    @staticmethod
+    def set_pose(t1_rad, t2_rad):
+        _pose.offer((t1_rad, t2_rad))
+
+    @staticmethod
+    def set_profile(vel_rad_s, acc_rad_s2):
+        """Servo-side ramp between goal positions (0 = unlimited)."""
+        acc = int(round(acc_rad_s2 / ACC_UNIT))
+        vel = int(round(vel_rad_s / VEL_UNIT))
+        with _bus.lock:
+            for i in (ID1, ID2):
+                pk.write4ByteTxRx(ph, i, ADDR_PROFILE_ACC, acc)
+                pk.write4ByteTxRx(ph, i, ADDR_PROFILE_VEL, vel)
+            _bus.account(4 * command.dxl_write(4), 4 * command.DXL_STATUS, 4)
+
+    @staticmethod
+    def torque_on():
+        if not ph.is_open:
+            ph.openPort();  ph.setBaudRate(BAUD)
+        _torque(1)
+        _pose.invalidate()                   # resend the next pose even if unchanged
+
+    @staticmethod
+    def torque_off():
+        _pose.cancel()
+        if _bus.worker is not None:
+            _bus.worker.drain()
+        with _bus.lock:
+            if ph is None or not ph.is_open:   # already released: shutdown after torque_off
+                return
+            _torque(0)
+            ph.closePort()
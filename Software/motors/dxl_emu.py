@@ -0,0 +1,401 @@
+"""Dynamixel Protocol 2.0 servos on a pseudo-terminal, for motors.dxl without hardware.
+
+    python3 -m motors.dxl_emu                      # prints the pty path
+    FIVELINK_DXL_DEV=/dev/pts/N python3 game_logic.py
+    python3 -m motors.dxl_emu --bench 2000         # time motors.dxl's real SDK path
+
+IDs 1 and 2 are XM430-like: a control table with torque enable, profile
+acceleration/velocity, goal/present position, moving, return delay time and
+status return level, and a present position that follows the goal at the
+profile velocity (motors.sim.Servo). PING, READ, WRITE, SYNC READ/WRITE and
+BULK READ/WRITE are parsed, with CRC and byte stuffing; anything else gets
+an Instruction Error status.
+
+The line is modelled as one half-duplex wire at --baud (8N1): an instruction
+is only acted on once it would have finished arriving, and each status packet
+goes out after the servo's return delay time (control table, factory 500 µs)
+plus its own wire time, in ID order for group reads. --usb-latency-ms adds
+the USB-serial adapter's receive latency to every status (FTDI default 16,
+1 with low_latency). With --baud auto the rate the host set on the pty is used.
+"""
+import collections, os, pty, select, struct, sys, termios, threading, time, tty
+
+BAUD = 57600                  # dxl.BAUD
+IDS  = (1, 2)
+MODEL, FIRMWARE = 1020, 52    # XM430-W350
+
+# instructions
+PING, READ, WRITE, REG_WRITE, ACTION = 0x01, 0x02, 0x03, 0x04, 0x05
+STATUS = 0x55
+SYNC_READ, SYNC_WRITE, BULK_READ, BULK_WRITE = 0x82, 0x83, 0x92, 0x93
+BROADCAST = 0xFE
+NAMES = {PING: "ping", READ: "read", WRITE: "write", SYNC_READ: "sync_read",
+         SYNC_WRITE: "sync_write", BULK_READ: "bulk_read", BULK_WRITE: "bulk_write"}
+
+# status errors
+ERR_INSTRUCTION, ERR_CRC, ERR_LENGTH, ERR_ACCESS = 0x02, 0x03, 0x05, 0x07
+
+# control table (address, size)
+ADDR_MODEL          = 0      # 2
+ADDR_FIRMWARE       = 6      # 1
+ADDR_ID             = 7      # 1
+ADDR_RETURN_DELAY   = 9      # 1, 2 µs units
+ADDR_TORQUE_EN      = 64     # 1
+ADDR_STATUS_RETURN  = 68     # 1: 0 ping only, 1 + reads, 2 all
+ADDR_PROFILE_ACC    = 108    # 4
+ADDR_PROFILE_VEL    = 112    # 4, 0.229 rpm units
+ADDR_GOAL_POS       = 116    # 4
+ADDR_MOVING         = 122    # 1
+ADDR_PRESENT_VEL    = 128    # 4
+ADDR_PRESENT_POS    = 132    # 4
+TABLE_SIZE          = 147
+_READ_ONLY = (0, 7) + tuple(range(ADDR_MOVING, TABLE_SIZE))
+
+RAW_PER_REV = 4096
+SPEED = 3000.0               # raw/s with profile velocity 0, as motors.sim
+
+HEADER = b"\xff\xff\xfd\x00"
+_CRC = []
+for _i in range(256):
+    _c = _i << 8
+    for _ in range(8):
+        _c = ((_c << 1) ^ 0x8005 if _c & 0x8000 else _c << 1) & 0xFFFF
+    _CRC.append(_c)
+
+
+def crc16(data):
+    crc = 0
+    for b in data:
+        crc = ((crc << 8) ^ _CRC[((crc >> 8) ^ b) & 0xFF]) & 0xFFFF
+    return crc
+
+
+def stuff(body):
+    return body.replace(b"\xff\xff\xfd", b"\xff\xff\xfd\xfd")
+
+
+def unstuff(body):
+    return body.replace(b"\xff\xff\xfd\xfd", b"\xff\xff\xfd")
+
+
+def packet(dev_id, inst, params=b""):
+    """Complete Protocol 2.0 packet (stuffed, with CRC)."""
+    body = stuff(bytes((inst,)) + bytes(params))
+    head = HEADER + struct.pack("<BH", dev_id, len(body) + 2)
+    pkt = head + body
+    return pkt + struct.pack("<H", crc16(pkt))
+
+
+class Device:
+    def __init__(self, dev_id):
+        self.id = dev_id
+        self.table = bytearray(TABLE_SIZE)
+        struct.pack_into("<H", self.table, ADDR_MODEL, MODEL)
+        self.table[ADDR_FIRMWARE] = FIRMWARE
+        self.table[ADDR_ID] = dev_id
+        self.table[ADDR_RETURN_DELAY] = 250
+        self.table[ADDR_STATUS_RETURN] = 2
+        from .sim import Servo            # here, so bench() does not register sim's channels
+        self.servo = Servo(f"emu{dev_id}", SPEED, RAW_PER_REV // 2)
+        self.servo.set_torque(False)
+        struct.pack_into("<i", self.table, ADDR_GOAL_POS, RAW_PER_REV // 2)
+
+    @property
+    def return_delay(self):
+        return self.table[ADDR_RETURN_DELAY] * 2e-6
+
+    @property
+    def status_level(self):
+        return self.table[ADDR_STATUS_RETURN]
+
+    def read(self, addr, n):
+        if addr + n > TABLE_SIZE:
+            return None
+        if addr + n > ADDR_MOVING and addr < ADDR_PRESENT_POS + 4:
+            pos = self.servo.present()
+            struct.pack_into("<i", self.table, ADDR_PRESENT_POS, int(round(pos)))
+            self.table[ADDR_MOVING] = int(self.servo.stats()["moving"])
+        return bytes(self.table[addr:addr + n])
+
+    def write(self, addr, data, at):
+        """Apply a write; returns a status error code (0 = ok)."""
+        if addr + len(data) > TABLE_SIZE:
+            return ERR_LENGTH
+        if any(a in _READ_ONLY for a in range(addr, addr + len(data))):
+            return ERR_ACCESS
+        self.table[addr:addr + len(data)] = data
+        if addr <= ADDR_TORQUE_EN < addr + len(data):
+            self.servo.set_torque(bool(self.table[ADDR_TORQUE_EN]))
+        if addr < ADDR_PROFILE_VEL + 4 and addr + len(data) > ADDR_PROFILE_VEL:
+            v = struct.unpack_from("<I", self.table, ADDR_PROFILE_VEL)[0]
+            self.servo.speed = v * 0.229 / 60 * RAW_PER_REV if v else SPEED
+        if addr < ADDR_GOAL_POS + 4 and addr + len(data) > ADDR_GOAL_POS and self.table[ADDR_TORQUE_EN]:
+            self.servo.command(struct.unpack_from("<i", self.table, ADDR_GOAL_POS)[0], at)
+        return 0
+
+
+class Emulator:
+    def __init__(self, ids=IDS, baud=BAUD, usb_latency_s=0.0, link=None):
+        self.devices = {i: Device(i) for i in ids}
+        self.baud = baud
+        self.usb_latency = usb_latency_s
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.path = os.ttyname(self.slave)
+        self.link = link
+        if link:
+            if os.path.islink(link):
+                os.unlink(link)
+            os.symlink(self.path, link)
+        self.counts = collections.Counter()
+        self.crc_errors = self.rx_bytes = self.tx_bytes = 0
+        self.busy_s = 0.0
+        self._buf = bytearray()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dxl-emu", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(1.0)
+        if self.link and os.path.islink(self.link):
+            os.unlink(self.link)
+        os.close(self.master)
+        os.close(self.slave)
+
+    # timing
+
+    _SPEEDS = {getattr(termios, f"B{b}"): b for b in
+               (9600, 19200, 38400, 57600, 115200, 230400, 460800, 500000, 576000,
+                921600, 1000000, 1152000, 1500000, 2000000, 2500000, 3000000, 3500000, 4000000)
+               if hasattr(termios, f"B{b}")}
+
+    def _baud(self):
+        if self.baud != "auto":
+            return self.baud
+        try:
+            return self._SPEEDS.get(termios.tcgetattr(self.slave)[5], BAUD)
+        except termios.error:
+            return BAUD
+
+    @staticmethod
+    def _sleep_until(t):
+        while True:
+            left = t - time.perf_counter()
+            if left <= 0:
+                return
+            time.sleep(left if left > 2e-3 else 0)   # spin the last bit, sleep() overshoots
+
+    # parsing
+
+    def _run(self):
+        while not self._stop.is_set():
+            r, _, _ = select.select([self.master], [], [], 0.1)
+            if not r:
+                continue
+            try:
+                data = os.read(self.master, 4096)
+            except OSError:                      # host closed the port
+                time.sleep(0.01)
+                continue
+            t_rx = time.perf_counter()
+            self.rx_bytes += len(data)
+            self._buf += data
+            self._parse(t_rx)
+
+    def _parse(self, t_rx):
+        buf = self._buf
+        while True:
+            i = buf.find(HEADER)
+            if i < 0:
+                del buf[:max(0, len(buf) - 3)]
+                return
+            del buf[:i]
+            if len(buf) < 7:
+                return
+            dev_id, length = struct.unpack_from("<BH", buf, 4)
+            n = 7 + length
+            if len(buf) < n:
+                return
+            pkt = bytes(buf[:n])
+            del buf[:n]
+            t0 = time.perf_counter()
+            wire = n * 10 / self._baud()
+            self._sleep_until(max(t_rx, t0) + wire)    # the host's bytes are still on the wire
+            if crc16(pkt[:-2]) != struct.unpack_from("<H", pkt, n - 2)[0]:
+                self.crc_errors += 1
+                if dev_id in self.devices:
+                    self._reply([(self.devices[dev_id], ERR_CRC, b"")])
+                continue
+            body = unstuff(pkt[7:-2])
+            self.counts[NAMES.get(body[0], f"0x{body[0]:02x}")] += 1
+            self._handle(dev_id, body[0], body[1:])
+            self.busy_s += time.perf_counter() - t0
+
+    def _handle(self, dev_id, inst, p):
+        now = time.monotonic()
+        devs = self.devices
+        out = []                                  # [(device, error, params)] in wire order
+        if inst == PING:
+            targets = sorted(devs) if dev_id == BROADCAST else [dev_id] if dev_id in devs else []
+            out = [(devs[i], 0, struct.pack("<HB", MODEL, FIRMWARE)) for i in targets]
+        elif inst == READ and dev_id in devs:
+            addr, n = struct.unpack_from("<HH", p)
+            d = devs[dev_id]
+            data = d.read(addr, n)
+            if d.status_level >= 1:
+                out = [(d, ERR_ACCESS, b"") if data is None else (d, 0, data)]
+        elif inst == WRITE:
+            addr = struct.unpack_from("<H", p)[0]
+            for i in (sorted(devs) if dev_id == BROADCAST else [dev_id] if dev_id in devs else []):
+                err = devs[i].write(addr, p[2:], now)
+                if dev_id != BROADCAST and devs[i].status_level >= 2:
+                    out = [(devs[i], err, b"")]
+        elif inst in (SYNC_WRITE, SYNC_READ):
+            addr, n = struct.unpack_from("<HH", p)
+            if inst == SYNC_WRITE:
+                for k in range(4, len(p) - n, n + 1):
+                    if p[k] in devs:
+                        devs[p[k]].write(addr, p[k + 1:k + 1 + n], now)
+            else:
+                for i in p[4:]:
+                    if i in devs and devs[i].status_level >= 1:
+                        data = devs[i].read(addr, n)
+                        out.append((devs[i], ERR_ACCESS, b"") if data is None else (devs[i], 0, data))
+        elif inst in (BULK_WRITE, BULK_READ):
+            k = 0
+            while k + 5 <= len(p):
+                i, addr, n = struct.unpack_from("<BHH", p, k)
+                k += 5
+                if inst == BULK_WRITE:
+                    if i in devs:
+                        devs[i].write(addr, p[k:k + n], now)
+                    k += n
+                elif i in devs and devs[i].status_level >= 1:
+                    data = devs[i].read(addr, n)
+                    out.append((devs[i], ERR_ACCESS, b"") if data is None else (devs[i], 0, data))
+        elif dev_id in devs:
+            out = [(devs[dev_id], ERR_INSTRUCTION, b"")]
+        self._reply(out)
+
+    def _reply(self, out):
+        t = time.perf_counter()
+        for dev, err, params in out:
+            pkt = packet(dev.id, STATUS, bytes((err,)) + params)
+            t += dev.return_delay + len(pkt) * 10 / self._baud()
+            self._sleep_until(t + self.usb_latency)
+            os.write(self.master, pkt)
+            self.tx_bytes += len(pkt)
+
+    def stats(self):
+        return {"packets": dict(self.counts), "crc_errors": self.crc_errors,
+                "rx_bytes": self.rx_bytes, "tx_bytes": self.tx_bytes, "busy_s": self.busy_s,
+                "present": {i: d.servo.present() for i, d in self.devices.items()}}
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))] if xs else 0.0
+
+
+def bench(n, baud, rate_hz=100.0):
+    """Time motors.dxl (dynamixel_sdk) against an emulator in another process.
+
+    Each operation runs n times, paced at rate_hz like the control loop (an
+    unpaced sync write only fills the adapter's buffer). Ends with a check
+    that the servos reached the last pose. Returns False on any failure.
+    """
+    import math, random, subprocess
+    emu = subprocess.Popen([sys.executable, "-m", "motors.dxl_emu", "--baud", str(baud)],
+                           stdout=subprocess.PIPE, text=True,
+                           cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    path = emu.stdout.readline().strip()
+    os.environ["FIVELINK_DXL_DEV"] = path
+    os.environ["FIVELINK_IO_WORKERS"] = "0"      # time the calls themselves
+    from . import dxl, command
+    sdk = dxl.dxl
+    dxl.BAUD = baud
+    rng = random.Random(0)
+    fails = collections.Counter()
+
+    def pose():
+        dxl.FiveBar.set_pose(rng.uniform(-math.pi, math.pi), rng.uniform(-math.pi, math.pi))
+
+    def read():
+        if dxl.pk.read4ByteTxRx(dxl.ph, dxl.ID1, ADDR_PRESENT_POS)[1] != sdk.COMM_SUCCESS:
+            fails["read"] += 1
+
+    def bulk_read():
+        if br.txRxPacket() != sdk.COMM_SUCCESS:
+            fails["bulk_read"] += 1
+
+    def timed(fn):
+        dxl.pk.ping(dxl.ph, dxl.ID1)              # fence: the line is idle again
+        ts, period = [], 1.0 / rate_hz
+        nxt = time.perf_counter()
+        for _ in range(n):
+            t0 = time.perf_counter()
+            fn()
+            ts.append(time.perf_counter() - t0)
+            nxt += period
+            Emulator._sleep_until(nxt)
+        return ts
+
+    res = {}
+    try:
+        dxl.connect()
+        br = sdk.GroupBulkRead(dxl.ph, dxl.pk)
+        for i in (dxl.ID1, dxl.ID2):
+            br.addParam(i, ADDR_PRESENT_POS, 4)
+        dxl.SYNC_WRITE = True
+        res["sync_write"] = timed(pose)
+        dxl.SYNC_WRITE = False
+        res["write_each"] = timed(pose)
+        res["read"] = timed(read)
+        res["bulk_read"] = timed(bulk_read)
+        goal = dxl._pose.last                      # raw goals of the last pose
+        time.sleep(2 * RAW_PER_REV / SPEED)
+        present = tuple(dxl.pk.read4ByteTxRx(dxl.ph, i, ADDR_PRESENT_POS)[0] for i in (dxl.ID1, dxl.ID2))
+        dxl.FiveBar.torque_off()
+    finally:
+        emu.terminate()
+        emu.wait(2.0)
+    bus = command.bus("dxl").stats()
+    print(f"[dxl-emu] {baud} baud, {n} calls each at {rate_hz:g} Hz; "
+          f"tx={bus['tx_bytes']} B, rx={bus['rx_bytes']} B, transactions={bus['transactions']}")
+    for label, ts in res.items():
+        ms = [t * 1e3 for t in ts]
+        print(f"  {label:<11} p50={_pct(ms, 50):.3f} ms  p99={_pct(ms, 99):.3f} ms  "
+              f"max={max(ms, default=0):.3f} ms  failed={fails[label]}")
+    ok = not fails and present == goal
+    print(f"  final pose {present} vs goal {goal}: {'ok' if present == goal else 'FAIL'}")
+    return ok
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--baud", default=str(BAUD), help='bits/s, or "auto" to follow the host')
+    ap.add_argument("--usb-latency-ms", type=float, default=0.0)
+    ap.add_argument("--link", help="also expose the pty as this path (symlink)")
+    ap.add_argument("--bench", type=int, metavar="N", help="run motors.dxl against a fresh emulator")
+    ap.add_argument("--rate", type=float, default=100.0, help="--bench call rate (Hz)")
+    args = ap.parse_args()
+    baud = args.baud if args.baud == "auto" else int(args.baud)
+    if args.bench:
+        sys.exit(0 if bench(args.bench, BAUD if baud == "auto" else baud, args.rate) else 1)
+    emu = Emulator(baud=baud, usb_latency_s=args.usb_latency_ms / 1e3, link=args.link).start()
+    print(args.link or emu.path, flush=True)
+    print(f"[dxl-emu] IDs {', '.join(map(str, emu.devices))} on {emu.path} at {baud} baud",
+          file=sys.stderr)
+    try:
+        while True:
+            time.sleep(5.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"[dxl-emu] {emu.stats()}", file=sys.stderr)
+        emu.stop()
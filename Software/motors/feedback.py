@@ -0,0 +1,91 @@
+"""Background device feedback: poll at a low rate, read from a cache.
+
+A Poller thread calls query(items) every 1/rate_hz s. The backend's query
+sends every request of the round back to back and then collects the
+replies (pipelined), so a round costs one turnaround instead of one per
+item, and the bus lock is only held while the requests are written:
+commands from the bus worker go out in between. Readers only look at the
+cache: get() is a dict lookup and never touches the bus.
+
+Each value is stamped with the monotonic time its round finished; get()
+with max_age treats older values as missing, so a safety check can tell
+a stuck reading from a stuck device.
+"""
+import collections, sys, threading, time, traceback
+
+from . import command
+
+STALE_ROUNDS = 5             # fresh() gives up on values older than this many periods
+
+_pollers = []
+
+
+class Poller(threading.Thread):
+    def __init__(self, bus_name, items, query, rate_hz, history=500):
+        """items: [(device, quantity)]; query(items) → {(device, quantity): value}."""
+        super().__init__(name=f"feedback-{bus_name}", daemon=True)
+        self.bus = command.bus(bus_name)
+        self.items = list(items)
+        self.query = query
+        self.period = 1.0 / rate_hz
+        self.stale_s = STALE_ROUNDS * self.period
+        self.cache = {}                   # (device, quantity) → (value, stamp)
+        self.rounds = self.missing = self.errors = 0
+        self._round = collections.deque(maxlen=history)   # round duration (s)
+        self._stop = threading.Event()
+        _pollers.append(self)
+
+    def run(self):
+        nxt = time.monotonic()
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            try:
+                got = self.query(self.items)
+            except Exception:
+                self.errors += 1
+                traceback.print_exc(file=sys.stderr)
+                got = {}
+            t1 = time.monotonic()
+            for it in self.items:
+                if it in got:
+                    self.cache[it] = (got[it], t1)     # one tuple store: readers never see half
+                else:
+                    self.missing += 1
+            self.rounds += 1
+            self._round.append(t1 - t0)
+            nxt = max(nxt + self.period, t1)           # a slow round does not cause a burst
+            self._stop.wait(max(0.0, nxt - time.monotonic()))
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def get(self, device, quantity="pos", max_age=None):
+        """Latest value, or None if there is none (or it is older than max_age s)."""
+        hit = self.cache.get((device, quantity))
+        if hit is None or (max_age is not None and time.monotonic() - hit[1] > max_age):
+            return None
+        return hit[0]
+
+    def fresh(self, device, quantity="pos"):
+        """get() limited to the last STALE_ROUNDS rounds."""
+        return self.get(device, quantity, self.stale_s)
+
+    def stamped(self, device, quantity="pos"):
+        """(value, monotonic stamp) or None."""
+        return self.cache.get((device, quantity))
+
+    def stats(self):
+        rs = list(self._round)
+        now = time.monotonic()
+        return {
+            "rate_hz": 1.0 / self.period, "rounds": self.rounds, "missing": self.missing,
+            "errors": self.errors,
+            "round_p50_ms": command._pct(rs, 50) * 1e3, "round_p99_ms": command._pct(rs, 99) * 1e3,
+            "age_ms": {f"{d}.{q}": (now - t) * 1e3 for (d, q), (_, t) in self.cache.items()},
+        }
+
+
+def stats():
+    return {p.bus.name: p.stats() for p in _pollers}
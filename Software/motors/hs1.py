@@ -1,74 +1,180 @@
-import sys
-sys.path.append('/home/aribanani/Documents/LSS_Library_Python/src')
-import lss
-import lss_const as lssc
-PORT = "/dev/ttyUSB1"
-BAUD = lssc.LSS_DefaultBaud
-lss.initBus(PORT, BAUD)
-
-_rail    = lss.LSS(0)
-_gripper = lss.LSS(1)
-
-if not hasattr(_rail, "position"):
-    _rail.position = lambda: int(_rail.getPosition() or 0)
-    _gripper.position = lambda: int(_gripper.getPosition() or 0)
-if not hasattr(_rail, "goto"):
-    _rail.goto     = _rail.move
-    _gripper.goto  = _gripper.move
-
-
-
-
-RAIL_MIN    = 0
-RAIL_MAX    = 36_000         # 3 600°  = 10 laps
-RAIL_STEP   = 100            # 10° per tick (in 0.1° units)
-rail_target = 0
-
-
-def _clamp(x, lo, hi): return max(lo, min(x, hi))
-
-class Rail:
-    @staticmethod
-    def nudge(axis_val: float):
-
-        global rail_target
-        if axis_val == 0.0:
-            return
-        rail_target = _clamp(
-            rail_target + axis_val * RAIL_STEP, RAIL_MIN, RAIL_MAX
-        )
-        _rail.move(int(rail_target))
-
-    @staticmethod
-    def get_norm() -> float:                 # 0.0 ,,, 1.0
-        return rail_target / RAIL_MAX
-
-    @staticmethod
-    def home():
-        global rail_target
-        rail_target = RAIL_MIN
-        _rail.move(rail_target)
-
-    @staticmethod
-    def torque_off():
-        global rail_target
-        rail_target = RAIL_MIN
-        _rail.move(rail_target)
-        #_rail.hold()
-
-
-
-GRIP_OPEN  =     0        # 0°  (trigger released)
-GRIP_CLOSE = 5000        # 1000° ≈ 2.78 laps  (trigger fully pressed)
-
-class Gripper:
-    @staticmethod
-    def set_ratio(t):    # t = 0 ,,, 1  (after dead-zone)
-        target = GRIP_OPEN + t * (GRIP_CLOSE - GRIP_OPEN)
-        _gripper.move(int(target))
-
-    @staticmethod
-    def torque_off():
-        _gripper.move(int(GRIP_OPEN ))
-        #_gripper.hold()
-
+import os, re, sys, time
+sys.path.append('/home/aribanani/Documents/LSS_Library_Python/src')
+from . import command, feedback
+PORT = os.environ.get("FIVELINK_LSS_PORT", "/dev/ttyUSB1")     # per station, see stations.py
+RAIL_MIN_S = 0.02               # min gap between LSS move commands per device
+GRIP_MIN_S = 0.02
+
+_rail = _gripper = None          # set by connect()
+_fb = None                       # feedback.Poller, set by start_feedback()
+
+def connect():
+    """Open the LSS bus; motors.select() calls this once."""
+    global _rail, _gripper
+    import lss
+    import lss_const as lssc
+    lss.initBus(PORT, lssc.LSS_DefaultBaud)
+
+    _rail    = lss.LSS(0)
+    _gripper = lss.LSS(1)
+
+    if not hasattr(_rail, "position"):          # cached, never a blocking query
+        _rail.position = lambda: int(Rail.present() or 0)
+        _gripper.position = lambda: int(Gripper.present() or 0)
+    if not hasattr(_rail, "goto"):
+        _rail.goto     = _rail.move
+        _gripper.goto  = _gripper.move
+
+
+
+
+# position / current feedback: every query of a round is written at once and
+# the replies (*<id>QD<value>\r) are read back without holding the bus lock,
+# so move commands from the bus worker are not held up behind them
+_QCMD = {"pos": "QD", "current": "QC"}
+_REPLY = re.compile(rb"\*(\d+)([A-Z]+)(-?\d+)\r$")
+READ_TIMEOUT_S = 0.05
+_bus = command.bus("lss")
+
+
+def _query(items):
+    import lss
+    ser = lss.LSS.bus
+    out = "".join(f"#{i}{_QCMD[q]}\r" for i, q in items).encode()
+    with _bus.lock:
+        ser.write(out)
+        _bus.account(len(out), 0, len(items))
+    want = {(i, _QCMD[q]): (i, q) for i, q in items}
+    got, rx = {}, 0
+    end = time.monotonic() + READ_TIMEOUT_S
+    while want and time.monotonic() < end:
+        line = ser.read_until(b"\r")
+        rx += len(line)
+        m = _REPLY.match(line)
+        if m is None:
+            if not line.endswith(b"\r"):         # serial timeout
+                break
+            continue
+        key = (int(m[1]), m[2].decode())
+        if key in want:
+            got[want.pop(key)] = int(m[3])
+    with _bus.lock:
+        _bus.account(0, rx, 0)
+    return got
+
+
+def start_feedback(rate_hz, current=False):
+    """Poll rail (ID 0) and gripper (ID 1) positions, and currents, in the background."""
+    global _fb
+    if _fb is None:
+        items = [(0, "pos"), (1, "pos")] + ([(0, "current"), (1, "current")] if current else [])
+        _fb = feedback.Poller("lss", items, _query, rate_hz)
+        _fb.start()
+    return _fb
+
+
+def _present(dev_id, quantity="pos"):
+    return None if _fb is None else _fb.fresh(dev_id, quantity)
+
+
+RAIL_MIN    = 0
+RAIL_MAX    = 36_000         # 3 600°  = 10 laps
+RAIL_STEP   = 100            # 10° per tick (in 0.1° units)
+rail_target = 0
+
+
+def _mover(dev, dev_id):
+    def send(pos):
+        dev().move(pos)
+        return command.lss_cmd(dev_id, "D", pos), 0, 1
+    return send
+
+# positions are whole 0.1° units; equal or too-frequent moves never hit the bus
+_rail_cmd = command.Channel("lss", "rail", _mover(lambda: _rail, 0), min_interval=RAIL_MIN_S)
+
+
+def _clamp(x, lo, hi): return max(lo, min(x, hi))
+
+class Rail:
+    @staticmethod
+    def nudge(axis_val: float):
+
+        global rail_target
+        if axis_val == 0.0:
+            return
+        rail_target = _clamp(
+            rail_target + axis_val * RAIL_STEP, RAIL_MIN, RAIL_MAX
+        )
+        _rail_cmd.offer(rail_target)
+
+    @staticmethod
+    def get_norm() -> float:                 # 0.0 ,,, 1.0 (commanded)
+        return rail_target / RAIL_MAX
+
+    @staticmethod
+    def present():                           # 0.1° from the feedback cache, or None
+        return _present(0)
+
+    @staticmethod
+    def present_norm():
+        p = _present(0)
+        return None if p is None else _clamp(p / RAIL_MAX, 0.0, 1.0)
+
+    @staticmethod
+    def current():                           # mA, if polled
+        return _present(0, "current")
+
+    @staticmethod
+    def home():
+        global rail_target
+        rail_target = RAIL_MIN
+        _rail_cmd.offer(rail_target, force=True)
+
+    @staticmethod
+    def torque_on():
+        pass                                 # LSS re-engages on the next move
+
+    @staticmethod
+    def torque_off():
+        global rail_target
+        rail_target = RAIL_MIN
+        _rail_cmd.offer(rail_target, force=True)
+        #_rail.hold()
+
+
+
+GRIP_OPEN  =     0        # 0°  (trigger released)
+GRIP_CLOSE = 5000        # 1000° ≈ 2.78 laps  (trigger fully pressed)
+GRIP_DEADBAND = 50       # 5°, ≈ the old 0.01 GRIP_STEP guard in game_logic
+
+_grip_cmd = command.Channel("lss", "gripper", _mover(lambda: _gripper, 1),
+                            min_interval=GRIP_MIN_S, deadband=GRIP_DEADBAND)
+
+class Gripper:
+    @staticmethod
+    def set_ratio(t):    # t = 0 ,,, 1  (after dead-zone)
+        target = GRIP_OPEN + t * (GRIP_CLOSE - GRIP_OPEN)
+        _grip_cmd.offer(target)
+
+    @staticmethod
+    def present():
+        return _present(1)
+
+    @staticmethod
+    def present_ratio():
+        p = _present(1)
+        return None if p is None else _clamp((p - GRIP_OPEN) / (GRIP_CLOSE - GRIP_OPEN), 0.0, 1.0)
+
+    @staticmethod
+    def current():
+        return _present(1, "current")
+
+    @staticmethod
+    def torque_on():
+        pass
+
+    @staticmethod
+    def torque_off():
+        _grip_cmd.offer(GRIP_OPEN, force=True)
+        #_gripper.hold()
+
@@ -0,0 +1,284 @@
+"""In-memory simulation of the Dynamixel and LSS buses (no hardware, no prints).
+
+Each servo keeps a goal and a present position that moves towards the goal
+at `speed` units/s. A command reaches the servo after its wire time at the
+bus baud rate plus LATENCY_S turnaround; with WIRE on, the bus worker also
+sleeps for that long, so bus occupancy matches the real lines.
+
+    FIVELINK_SIM_LOG=1          print every command to stderr
+    FIVELINK_SIM_WIRE=0         do not sleep for the wire time
+    FIVELINK_SIM_LATENCY_MS=0.5 turnaround per transaction
+
+stats() returns goal/present position and counters per servo, for tests
+and benchmarks. Rail/Gripper.present() go through the same feedback cache
+as on the real bus (answered from the model, with the query's wire time).
+"""
+import math, os, sys, threading, time
+from . import command, feedback
+
+LOG  = os.environ.get("FIVELINK_SIM_LOG", "0") != "0"
+WIRE = os.environ.get("FIVELINK_SIM_WIRE", "1") != "0"
+LATENCY_S = float(os.environ.get("FIVELINK_SIM_LATENCY_MS", "0.5")) / 1e3
+BAUD = {"dxl": 57600, "lss": 115200}    # dxl.BAUD, lss_const.LSS_DefaultBaud
+
+DXL_SPEED = 3000.0       # raw/s  (≈ 44 rpm, XM430 at 12 V)
+LSS_SPEED = 3600.0       # 0.1°/s (60 rpm)
+
+RAIL_MIN  = 0
+RAIL_MAX  = 36_000
+RAIL_STEP = 100
+
+CURRENT_IDLE_MA, CURRENT_MOVING_MA = 60, 350
+
+GRIP_OPEN, GRIP_CLOSE = 0, 5000
+GRIP_DEADBAND = 50
+RAIL_MIN_S = GRIP_MIN_S = 0.02          # same command spacing as hs1
+
+_servos = {}
+
+
+class Servo:
+    """Speed-limited position model; commands take effect at a given time."""
+
+    def __init__(self, name, speed, pos=0.0):
+        self.name = name
+        self.speed = self.default_speed = speed
+        self.goal = self.pos = float(pos)
+        self.torque = True
+        self.commands = 0
+        self.travel = 0.0
+        self._queue = []                 # (effective_at, goal), in order
+        self._t = time.monotonic()
+        self._lock = threading.Lock()
+        _servos[name] = self
+
+    def _advance(self, now):
+        while True:
+            if self._queue and self._queue[0][0] <= now:
+                t, g = self._queue.pop(0)
+            else:
+                t, g = now, None
+            if self.torque and t > self._t:
+                step = min(abs(self.goal - self.pos), self.speed * (t - self._t))
+                self.pos += math.copysign(step, self.goal - self.pos)
+                self.travel += step
+            self._t = max(self._t, t)
+            if g is None:
+                return
+            self.goal = g
+
+    def command(self, goal, at):
+        with self._lock:
+            self._advance(time.monotonic())
+            self._queue.append((at, float(goal)))
+            self.commands += 1
+
+    def set_torque(self, on):
+        with self._lock:
+            self._advance(time.monotonic())
+            self.torque = on
+
+    def present(self):
+        with self._lock:
+            self._advance(time.monotonic())
+            return self.pos
+
+    def stats(self):
+        pos = self.present()
+        return {"goal": self.goal, "present": pos, "moving": pos != self.goal or bool(self._queue),
+                "commands": self.commands, "travel": self.travel, "torque": self.torque}
+
+
+def _sender(bus, servos, size):
+    """Channel send(q): book the wire time, then hand each value to its servo."""
+    baud = BAUD[bus]
+
+    def send(q):
+        n = size(q)
+        wire = n * 10 / baud + LATENCY_S          # 8N1
+        if WIRE:
+            time.sleep(wire)
+            at = time.monotonic()
+        else:
+            at = time.monotonic() + wire
+        vals = q if isinstance(q, tuple) else (q,)
+        for s, v in zip(servos, vals):
+            s.command(v, at)
+        if LOG:
+            print(f"[sim] {'/'.join(s.name for s in servos)} ← {q}", file=sys.stderr)
+        return n, 0, 1
+    return send
+
+
+# Dynamixel: ID1 = right, ID2 = left, 12-bit raw positions
+
+_dxl = (Servo("dxl1", DXL_SPEED, 2048), Servo("dxl2", DXL_SPEED, 2048))
+_pose = command.Channel("dxl", "fivebar",
+                        _sender("dxl", _dxl, lambda q: command.dxl_sync_write(2, 4)),
+                        quantize=lambda p: (command.dxl_raw(p[0]), command.dxl_raw(p[1])))
+
+
+def _raw_to_rad(raw):
+    return raw / 4095 * 2 * math.pi - math.pi
+
+
+class FiveBar:
+    @staticmethod
+    def set_pose(t1_rad, t2_rad):
+        _pose.offer((t1_rad, t2_rad))
+
+    @staticmethod
+    def set_profile(vel_rad_s, acc_rad_s2):
+        """Only the velocity limit is modelled (0 = servo maximum)."""
+        v = vel_rad_s / (2 * math.pi) * 4095
+        for s in _dxl:
+            s.speed = min(v, s.default_speed) if v > 0 else s.default_speed
+        if LOG:
+            print(f"[sim] fivebar profile {vel_rad_s:.2f} rad/s, {acc_rad_s2:.2f} rad/s²", file=sys.stderr)
+
+    @staticmethod
+    def present():
+        """Present servo angles (rad), same order as set_pose."""
+        return tuple(_raw_to_rad(s.present()) for s in _dxl)
+
+    @staticmethod
+    def torque_on():
+        for s in _dxl:
+            s.set_torque(True)
+        _pose.invalidate()
+
+    @staticmethod
+    def torque_off():
+        _pose.cancel()
+        if _pose.bus.worker is not None:
+            _pose.bus.worker.drain()
+        for s in _dxl:
+            s.set_torque(False)
+
+
+# LSS: rail (ID 0) and gripper (ID 1), positions in 0.1°
+
+_rail_servo = Servo("rail", LSS_SPEED)
+_grip_servo = Servo("gripper", LSS_SPEED)
+_rail_cmd = command.Channel("lss", "rail",
+                            _sender("lss", (_rail_servo,), lambda q: command.lss_cmd(0, "D", q)),
+                            min_interval=RAIL_MIN_S)
+_grip_cmd = command.Channel("lss", "gripper",
+                            _sender("lss", (_grip_servo,), lambda q: command.lss_cmd(1, "D", q)),
+                            min_interval=GRIP_MIN_S, deadband=GRIP_DEADBAND)
+rail_target = 0
+_fb = None
+
+
+def _query(items):
+    """Pipelined LSS queries: all requests on the wire, one turnaround, all replies."""
+    lss = command.bus("lss")
+    servos = {0: _rail_servo, 1: _grip_servo}
+    cmd = {"pos": "QD", "current": "QC"}
+    tx = sum(command.lss_cmd(i, cmd[q]) for i, q in items)
+    with lss.lock:                               # requests share the line with moves
+        if WIRE:
+            time.sleep(tx * 10 / BAUD["lss"])
+        lss.account(tx, 0, len(items))
+    got = {}
+    for i, q in items:
+        st = servos[i].stats()
+        got[(i, q)] = int(round(st["present"])) if q == "pos" else \
+            (CURRENT_MOVING_MA if st["moving"] else CURRENT_IDLE_MA)
+    rx = sum(command.lss_cmd(i, cmd[q], v) for (i, q), v in got.items())
+    if WIRE:
+        time.sleep(LATENCY_S + rx * 10 / BAUD["lss"])
+    with lss.lock:
+        lss.account(0, rx, 0)
+    return got
+
+
+def start_feedback(rate_hz, current=False):
+    global _fb
+    if _fb is None:
+        items = [(0, "pos"), (1, "pos")] + ([(0, "current"), (1, "current")] if current else [])
+        _fb = feedback.Poller("lss", items, _query, rate_hz)
+        _fb.start()
+    return _fb
+
+
+def _present(dev_id, quantity="pos"):
+    return None if _fb is None else _fb.fresh(dev_id, quantity)
+
+
+class Rail:
+    @staticmethod
+    def nudge(axis_val: float):
+        global rail_target
+        if axis_val == 0.0:
+            return
+        rail_target = max(RAIL_MIN, min(RAIL_MAX, rail_target + axis_val * RAIL_STEP))
+        _rail_cmd.offer(rail_target)
+
+    @staticmethod
+    def get_norm() -> float:
+        return rail_target / RAIL_MAX
+
+    @staticmethod
+    def present():
+        """Feedback cache, like hs1 (stats() has the model's own position)."""
+        return _present(0)
+
+    @staticmethod
+    def present_norm():
+        p = _present(0)
+        return None if p is None else max(0.0, min(1.0, p / RAIL_MAX))
+
+    @staticmethod
+    def current():
+        return _present(0, "current")
+
+    @staticmethod
+    def home():
+        global rail_target
+        rail_target = RAIL_MIN
+        _rail_cmd.offer(rail_target, force=True)
+
+    @staticmethod
+    def torque_on():
+        pass
+
+    @staticmethod
+    def torque_off():
+        Rail.home()
+
+
+class Gripper:
+    @staticmethod
+    def set_ratio(t):
+        _grip_cmd.offer(GRIP_OPEN + t * (GRIP_CLOSE - GRIP_OPEN))
+
+    @staticmethod
+    def present():
+        return _present(1)
+
+    @staticmethod
+    def present_ratio():
+        p = _present(1)
+        return None if p is None else max(0.0, min(1.0, (p - GRIP_OPEN) / (GRIP_CLOSE - GRIP_OPEN)))
+
+    @staticmethod
+    def current():
+        return _present(1, "current")
+
+    @staticmethod
+    def torque_on():
+        pass
+
+    @staticmethod
+    def torque_off():
+        _grip_cmd.offer(GRIP_OPEN, force=True)
+
+
+def connect():
+    pass
+
+
+def stats():
+    """Per-servo goal, present position, command count and travel."""
+    return {n: s.stats() for n, s in _servos.items()}
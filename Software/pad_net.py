@@ -0,0 +1,394 @@
+"""Remote pad over UDP: a sender streams pad state, controller.poll() reads it.
+
+    python3 pad_net.py send robot.local:47612       # at the operator's pad
+    FIVELINK_PAD=udp:47612 python3 game_logic.py    # on the robot
+    python3 pad_net.py test --loss 0.05 --reorder 0.05   # loopback check
+
+Each datagram is the whole pad state (37 bytes): sender id, sequence
+number, send time (wall clock, ns), button bits, the axes as int16 and an
+8-bit press counter per button, so a lost packet costs nothing but its
+age and a press still shows up as an edge if the packet carrying it is lost.
+
+The receiver drains the socket on every poll and keeps the newest packet:
+anything not newer than the last accepted sequence number (duplicate or
+reordered) is dropped, and so is a packet that sat in a queue for more than
+STALE_S longer than the quickest one seen recently. The path delay is
+measured against that quickest packet, so it needs no clock sync. After
+HOLD_S without a packet the sticks read zero and the trigger holds (the arm
+stops where it is and does not drop the ball); after LOST_S the receiver
+holds ◯, which ends the game like a player would. Before the first packet
+it only waits.
+
+Latency is send→receive on the wall clocks (exact over loopback, needs
+NTP/PTP between hosts); jitter is the RFC 3550 interarrival jitter, which
+is valid without synchronized clocks.
+"""
+import collections, os, random, socket, struct, sys, threading, time
+
+from pad_shm import AXES, DIGITAL
+
+PORT     = 47612
+RATE_HZ  = 250                 # sender rate
+HOLD_S   = 0.10                # no packet this long: sticks to zero
+LOST_S   = 1.00                # ... this long: hold ◯ (end the game)
+STALE_S  = 0.05                # queued this much longer than the quickest packet: drop
+WINDOW   = 500                 # packets per window of the quickest-transit estimate
+
+MAGIC   = b"FP"
+VERSION = 1
+_PKT = struct.Struct(f"<2sBBHIqH{len(AXES)}h{len(DIGITAL)}B")   # magic ver flags sender seq t bits axes presses
+_AX_SCALE = 32767
+_BACK = 1 << DIGITAL.index("back")
+
+
+# kernel receive timestamps (Linux), so latency does not include the wait for poll()
+_SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35 if sys.platform.startswith("linux") else None)
+_TIMESPEC = struct.Struct("qq")
+
+
+def parse_addr(s, host="0.0.0.0"):
+    """"port" or "host:port" → (host, port)."""
+    h, _, p = s.rpartition(":")
+    return (h or host), int(p)
+
+
+def _pct(xs, p):
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+
+class Sender:
+    def __init__(self, addr):
+        self.addr = addr
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sendto = self.sock.sendto
+        self.sender = random.getrandbits(16)     # a restarted sender starts a new sequence
+        self.seq = 0
+        self.presses = [0] * len(DIGITAL)
+        self._bits = 0
+
+    def pack(self, state, axes):
+        bits = 0
+        for i, k in enumerate(DIGITAL):
+            if state.get(k):
+                bits |= 1 << i
+                if not self._bits & (1 << i):
+                    self.presses[i] = (self.presses[i] + 1) & 0xFF
+        self._bits = bits
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        return _PKT.pack(MAGIC, VERSION, 0, self.sender, self.seq, time.time_ns(), bits,
+                         *(int(max(-1.0, min(1.0, axes.get(k, 0.0))) * _AX_SCALE) for k in AXES),
+                         *self.presses)
+
+    def send(self, state, axes):
+        self.sendto(self.pack(state, axes), self.addr)
+
+    def stream(self, poll, rate_hz=RATE_HZ, stop=None):
+        """send(poll()) at rate_hz until stop (a threading.Event) is set."""
+        stop = stop or threading.Event()
+        period = 1.0 / rate_hz
+        nxt = time.monotonic()
+        while not stop.is_set():
+            pad = poll()
+            self.send(pad["state"], pad["axes"])
+            nxt += period
+            stop.wait(max(0.0, nxt - time.monotonic()))
+
+    def close(self):
+        self.sock.close()
+
+
+class Receiver:
+    """Stands in for a pad: poll() and snapshot() like pad_shm.Reader."""
+
+    def __init__(self, addr=("0.0.0.0", PORT), history=2000):
+        self.addr = addr
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(addr)
+        self.sock.setblocking(False)
+        self._kstamp = False
+        if _SO_TIMESTAMPNS is not None:
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, _SO_TIMESTAMPNS, 1)
+                self._kstamp = True
+            except OSError:
+                pass
+        self.sender = None
+        self.seq = None
+        self.t_rx = None                          # monotonic time of the last accepted packet
+        self.bits = 0
+        self.axes = dict.fromkeys(AXES, 0.0)
+        self.presses = (0,) * len(DIGITAL)
+        self._seen = None                         # presses at the last poll()
+        self._base = [None, None]                 # quickest transit, previous / this window
+        self._n = 0
+        self._last_transit = None
+        self.jitter = 0.0                         # RFC 3550, seconds
+        self.received = self.accepted = self.old = self.stale = self.bad = 0
+        self.lost = self.superseded = self.holds = self.losses = 0
+        self.mode = "waiting"                     # waiting | live | hold | lost
+        self._latency = collections.deque(maxlen=history)   # send → receive (s)
+        self._delay = collections.deque(maxlen=history)     # over the quickest transit (s)
+
+    # socket
+
+    def _drain(self):
+        newest = None
+        while True:
+            try:
+                data, anc, _, _ = self.sock.recvmsg(64, 64)
+            except (BlockingIOError, InterruptedError):
+                break
+            t_rx_ns, t_rx = time.time_ns(), time.monotonic()
+            for level, kind, d in anc:
+                if level == socket.SOL_SOCKET and kind == _SO_TIMESTAMPNS and len(d) >= _TIMESPEC.size:
+                    sec, nsec = _TIMESPEC.unpack_from(d)
+                    k_ns = sec * 1_000_000_000 + nsec
+                    t_rx -= (t_rx_ns - k_ns) / 1e9   # arrival, on the monotonic clock
+                    t_rx_ns = k_ns
+            self.received += 1
+            if len(data) != _PKT.size:
+                self.bad += 1
+                continue
+            pkt = _PKT.unpack(data)
+            if pkt[0] != MAGIC or pkt[1] != VERSION:
+                self.bad += 1
+                continue
+            if self._accept(pkt, t_rx_ns):
+                if newest is not None:
+                    self.superseded += 1
+                newest = pkt, t_rx
+        if newest is not None:
+            pkt, self.t_rx = newest
+            self.bits = pkt[6]
+            self.axes = {k: v / _AX_SCALE for k, v in zip(AXES, pkt[7:7 + len(AXES)])}
+            self.presses = pkt[7 + len(AXES):]
+        self._update_mode()
+
+    def _accept(self, pkt, t_rx_ns):
+        sender, seq, t_tx = pkt[3], pkt[4], pkt[5]
+        if sender != self.sender:                 # new (or restarted) sender
+            self.sender, self.seq, self._seen = sender, None, None
+            self._base = [None, None]
+            self._last_transit = None
+        elif self.seq is not None:
+            ahead = (seq - self.seq) & 0xFFFFFFFF
+            if ahead == 0 or ahead >= 1 << 31:    # duplicate or behind the last one
+                self.old += 1
+                return False
+            self.lost += ahead - 1                # may be filled in late; those count as old
+        transit = (t_rx_ns - t_tx) / 1e9
+        base = min(b for b in (*self._base, transit) if b is not None)
+        self._n += 1
+        if self._base[1] is None or transit < self._base[1]:
+            self._base[1] = transit
+        if self._n % WINDOW == 0:                 # forget minima older than two windows
+            self._base = [self._base[1], None]
+        if self._last_transit is not None:
+            self.jitter += (abs(transit - self._last_transit) - self.jitter) / 16
+        self._last_transit = transit
+        self.seq = seq
+        if transit - base > STALE_S:
+            self.stale += 1
+            return False
+        self.accepted += 1
+        self._latency.append(transit)
+        self._delay.append(transit - base)
+        return True
+
+    def _update_mode(self):
+        if self.t_rx is None:
+            return
+        age = time.monotonic() - self.t_rx
+        mode = "lost" if age > LOST_S else "hold" if age > HOLD_S else "live"
+        if mode != self.mode:
+            if mode == "hold":
+                self.holds += 1
+                print(f"[net] no pad data for {age * 1e3:.0f} ms: sticks released", file=sys.stderr)
+            elif mode == "lost":
+                self.losses += 1
+                print(f"[net] link lost ({age:.1f} s): ending the game", file=sys.stderr)
+            elif self.mode != "waiting":
+                print("[net] link back", file=sys.stderr)
+            self.mode = mode
+
+    def _current(self):
+        if self.mode == "live":
+            return self.bits, dict(self.axes)
+        axes = dict.fromkeys(AXES, 0.0)
+        if self.mode == "waiting":
+            axes["lt"] = -1.0                     # trigger released
+            return 0, axes
+        axes["lt"] = self.axes["lt"]              # keep the grip
+        return (_BACK if self.mode == "lost" else 0), axes
+
+    # pad interface
+
+    def poll(self):
+        """Same shape as controller.poll()."""
+        self._drain()
+        bits, axes = self._current()
+        presses = self.presses
+        seen = self._seen or presses
+        self._seen = presses
+        event = {k: int(presses[i] != seen[i]) for i, k in enumerate(DIGITAL)}
+        if self.mode == "lost":
+            event["back"] = 1
+        return {"event": event,
+                "state": {k: bits >> i & 1 for i, k in enumerate(DIGITAL)},
+                "axes": axes}
+
+    def snapshot(self):
+        """(stamp, axes, state, presses) for controller.pump()."""
+        self._drain()
+        bits, axes = self._current()
+        return (self.t_rx or time.monotonic(), axes,
+                {k: bits >> i & 1 for i, k in enumerate(DIGITAL)}, tuple(self.presses))
+
+    def stats(self):
+        lat, dly = list(self._latency), list(self._delay)
+        return {
+            "mode": self.mode, "kernel_stamps": self._kstamp, "received": self.received, "accepted": self.accepted,
+            "lost": self.lost, "old": self.old, "stale": self.stale, "bad": self.bad,
+            "superseded": self.superseded, "holds": self.holds, "losses": self.losses,
+            "latency_p50_ms": _pct(lat, 50) * 1e3, "latency_p99_ms": _pct(lat, 99) * 1e3,
+            "latency_max_ms": max(lat, default=0.0) * 1e3,
+            "delay_p99_ms": _pct(dly, 99) * 1e3, "jitter_ms": self.jitter * 1e3,
+        }
+
+    def close(self):
+        self.sock.close()
+
+
+def _fmt(st):
+    return ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in st.items())
+
+
+def _lossy(sock, loss, reorder, delay_s):
+    """sendto() replacement that drops and swaps datagrams, for test()."""
+    held = []
+    real = sock.sendto
+
+    def sendto(data, addr):
+        if random.random() < loss:
+            return len(data)
+        if held:
+            real(data, addr)
+            real(held.pop(), addr)                # the older one arrives second
+            return len(data)
+        if random.random() < reorder:
+            held.append(data)
+            return len(data)
+        if delay_s and random.random() < 0.01:    # now and then a packet stuck in a queue
+            threading.Timer(delay_s, real, (data, addr)).start()
+            return len(data)
+        return real(data, addr)
+    return sendto
+
+
+def test(seconds=3.0, loss=0.0, reorder=0.0, delay_ms=0.0, port=0):
+    """Loopback run with a synthetic pad; checks edges, ordering and the timeouts."""
+    import math
+    rx = Receiver(("127.0.0.1", port))
+    tx = Sender(rx.sock.getsockname())
+    tx.sendto = _lossy(tx.sock, loss, reorder, delay_ms / 1e3)
+    presses_sent = [0]
+    t0 = time.monotonic()
+
+    def synthetic():
+        t = time.monotonic() - t0
+        sel = int(t * 4) % 2                     # ✕ pressed 4 times a second (held 125 ms)
+        if sel and not synthetic.prev:
+            presses_sent[0] += 1
+        synthetic.prev = sel
+        state = dict.fromkeys(DIGITAL, 0)
+        state["sel"] = sel
+        return {"state": state, "axes": {"lx": 0.0, "ly": 0.0, "rx": math.sin(t), "ry": math.cos(t), "lt": 0.5}}
+    synthetic.prev = 0
+
+    stop = threading.Event()
+    th = threading.Thread(target=tx.stream, args=(synthetic,), kwargs={"stop": stop}, daemon=True)
+    th.start()
+    edges, seq_ok, last = 0, True, None
+    end = t0 + seconds
+    while time.monotonic() < end:
+        pad = rx.poll()
+        edges += pad["event"]["sel"]
+        if last is not None and rx.seq is not None and ((rx.seq - last) & 0xFFFFFFFF) >= 1 << 31:
+            seq_ok = False
+        last = rx.seq
+        time.sleep(0.01)                          # a 100 Hz control loop
+    stop.set()
+    th.join()
+    time.sleep(HOLD_S * 1.5)
+    hold = rx.poll()
+    time.sleep(LOST_S)
+    lost = rx.poll()
+    st = rx.stats()
+    print("[net] " + _fmt(st))
+    checks = {
+        "edges": edges == presses_sent[0],
+        "in order": seq_ok,
+        "hold": hold["axes"]["rx"] == 0.0 and abs(hold["axes"]["lt"] - 0.5) < 1e-3 and not hold["state"]["back"],
+        "lost": bool(lost["state"]["back"]),
+    }
+    print(f"[net] edges {edges}/{presses_sent[0]}; " + ", ".join(f"{k}: {'ok' if v else 'FAIL'}" for k, v in checks.items()))
+    tx.close()
+    rx.close()
+    return all(checks.values())
+
+
+def _send_main(addr, rate_hz):
+    if os.environ.get("FIVELINK_PAD", "").startswith("udp:"):
+        os.environ["FIVELINK_PAD"] = "auto"      # read the pad here, not the network
+    import controller
+    tx = Sender(addr)
+    print(f"[net] sending pad to {addr[0]}:{addr[1]} at {rate_hz:g} Hz", file=sys.stderr)
+    try:
+        tx.stream(controller.poll, rate_hz)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tx.close()
+        controller.close()
+
+
+def _recv_main(addr):
+    rx = Receiver(addr)
+    print(f"[net] listening on {addr[0]}:{addr[1]}", file=sys.stderr)
+    try:
+        while True:
+            for _ in range(100):
+                rx.poll()
+                time.sleep(0.01)
+            print("[net] " + _fmt(rx.stats()), file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rx.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("send", help="stream the local pad to a robot")
+    s.add_argument("addr", help="host:port of the robot")
+    s.add_argument("--rate", type=float, default=RATE_HZ)
+    r = sub.add_parser("recv", help="print receiver statistics")
+    r.add_argument("addr", nargs="?", default=str(PORT), help="[host:]port to listen on")
+    t = sub.add_parser("test", help="loopback test with a synthetic pad")
+    t.add_argument("--seconds", type=float, default=3.0)
+    t.add_argument("--loss", type=float, default=0.0, help="fraction of datagrams dropped")
+    t.add_argument("--reorder", type=float, default=0.0, help="fraction of datagrams swapped")
+    t.add_argument("--delay-ms", type=float, default=0.0, help="hold 1%% of datagrams this long")
+    args = ap.parse_args()
+    if args.cmd == "send":
+        _send_main(parse_addr(args.addr, "127.0.0.1"), args.rate)
+    elif args.cmd == "recv":
+        _recv_main(parse_addr(args.addr))
+    else:
+        sys.exit(0 if test(args.seconds, args.loss, args.reorder, args.delay_ms) else 1)
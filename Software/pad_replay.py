@@ -0,0 +1,196 @@
+"""Record the controller.poll() stream and play it back without a pad.
+
+    FIVELINK_PAD_RECORD=run.pad python3 game_logic.py             # capture while playing
+    FIVELINK_PAD=replay:run.pad python3 game_logic.py --headless  # replay in real time
+    python3 pad_replay.py run.pad                                 # as fast as possible
+
+A recording is a 16-byte header followed by one 32-byte record per poll:
+seconds since the first poll, digital state and edge bits (pad_shm.DIGITAL
+order) and the axes (pad_shm.AXES order). Replay hands back the same dicts
+poll() returned, so game_logic cannot tell it from a pad. When the
+recording runs out the player holds ◯, which ends the game like a player would.
+
+FIVELINK_REPLAY_SPEED scales real-time replay (2 = twice as fast). The CLI
+drives control_step directly at the recorded rate against the simulated motors
+and prints a digest of the run, so a session can be used as a regression
+test (--expect) and a benchmark.
+"""
+import atexit, hashlib, os, struct, sys, time
+import numpy as np
+
+from pad_shm import AXES, DIGITAL
+
+MAGIC   = b"FLPAD"
+VERSION = 1
+_HEAD = struct.Struct("<5sBBB8x")                       # magic, version, n_digital, n_axes
+_REC  = struct.Struct(f"<dHH{len(AXES)}f")              # t, state bits, event bits, axes
+RECORD = np.dtype([("t", "<f8"), ("state", "<u2"), ("event", "<u2"),
+                   ("axes", "<f4", (len(AXES),))])
+assert RECORD.itemsize == _REC.size
+
+_BACK = 1 << DIGITAL.index("back")
+
+
+def _bits(d):
+    b = 0
+    for i, k in enumerate(DIGITAL):
+        if d.get(k):
+            b |= 1 << i
+    return b
+
+
+class Recorder:
+    """Appends poll() results to `path`; the file is buffered, so a poll costs a pack."""
+
+    def __init__(self, path):
+        self.f = open(path, "wb", buffering=1 << 16)
+        self.f.write(_HEAD.pack(MAGIC, VERSION, len(DIGITAL), len(AXES)))
+        self.t0 = None
+        self.n = 0
+        atexit.register(self.close)
+
+    def record(self, pad):
+        now = time.monotonic()
+        if self.t0 is None:
+            self.t0 = now
+        ax = pad["axes"]
+        self.f.write(_REC.pack(now - self.t0, _bits(pad["state"]), _bits(pad["event"]),
+                               *(ax.get(k, 0.0) for k in AXES)))
+        self.n += 1
+
+    def close(self):
+        if not self.f.closed:
+            self.f.close()
+
+
+def load(path):
+    """The recorded polls as a structured array (t, state, event, axes)."""
+    with open(path, "rb") as f:
+        magic, ver, nd, na = _HEAD.unpack(f.read(_HEAD.size))
+        if magic != MAGIC or ver != VERSION or (nd, na) != (len(DIGITAL), len(AXES)):
+            raise ValueError(f"{path}: not a v{VERSION} pad recording")
+        return np.fromfile(f, RECORD)
+
+
+class Player:
+    """Stands in for a pad: poll() and snapshot() like pad_shm.Reader.
+
+    speed > 0 plays by the wall clock from the first poll (sample and hold,
+    edges of skipped records are kept); speed = 0 returns the next record on
+    every poll, which is what the fast CLI replay uses.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        rec = load(path)
+        self.t = rec["t"].tolist()
+        self.state = rec["state"].tolist()
+        self.event = rec["event"].tolist()
+        self.axes = [dict(zip(AXES, a)) for a in rec["axes"].tolist()]
+        self.speed = speed
+        self.i = -1
+        self.t0 = None
+        self.presses = [0] * len(DIGITAL)
+        self.done = not self.t
+
+    def __len__(self):
+        return len(self.t)
+
+    def _advance(self):
+        """Move to the record due now; OR of the edges passed on the way."""
+        n = len(self.t)
+        if self.speed <= 0:
+            j = self.i + 1
+        else:
+            now = time.monotonic()
+            if self.t0 is None:
+                self.t0 = now
+            el = (now - self.t0) * self.speed
+            j = self.i
+            while j + 1 < n and self.t[j + 1] <= el:
+                j += 1
+            if j + 1 >= n and el > self.t[-1]:
+                j = n
+        ev = 0
+        for k in range(self.i + 1, min(j, n - 1) + 1):
+            ev |= self.event[k]
+        self.i = j
+        if j >= n:
+            self.done = True
+        for b in range(len(DIGITAL)):
+            if ev >> b & 1:
+                self.presses[b] += 1
+        return ev
+
+    def _current(self):
+        if self.done:                                   # out of input: hold ◯
+            return _BACK, dict.fromkeys(AXES, 0.0)
+        j = max(self.i, 0)
+        return self.state[j], dict(self.axes[j])
+
+    def poll(self):
+        ev = self._advance()
+        bits, axes = self._current()
+        if self.done:
+            ev |= _BACK
+        return {"event": {k: ev >> i & 1 for i, k in enumerate(DIGITAL)},
+                "state": {k: bits >> i & 1 for i, k in enumerate(DIGITAL)},
+                "axes": axes}
+
+    def snapshot(self):
+        """(stamp, axes, state, presses) for controller.pump(); does not advance."""
+        bits, axes = self._current()
+        return (time.monotonic(), axes, {k: bits >> i & 1 for i, k in enumerate(DIGITAL)},
+                tuple(self.presses))
+
+    def close(self):
+        pass
+
+
+def run(path, expect=None):
+    """Replay `path` through game_logic.control_step as fast as possible."""
+    import contextlib
+    os.environ["FIVELINK_MOTORS"] = "sim"
+    os.environ.setdefault("FIVELINK_SIM_WIRE", "0")
+    os.environ["FIVELINK_PAD"] = "replay:" + path
+    os.environ["FIVELINK_REPLAY_SPEED"] = "0"
+    os.environ.setdefault("FIVELINK_FLIGHT", "0")
+    os.environ.pop("FIVELINK_PAD_RECORD", None)
+    if "--headless" not in sys.argv:
+        sys.argv.append("--headless")
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        import game_logic as gl
+        player = gl.controller._replay
+        dt = float(np.median(np.diff(player.t))) if len(player) > 1 else gl.TICK_S
+        h = hashlib.sha1()
+        work = []
+        t0 = time.perf_counter()
+        while True:
+            s = time.perf_counter()
+            snap = gl.control_step(dt)
+            work.append(time.perf_counter() - s)
+            if snap is None:
+                break
+            h.update(struct.pack("<5d", *snap["end_effector"], snap["rail"],
+                                 *(snap["setpoint"] or (0.0, 0.0))))
+        wall = time.perf_counter() - t0
+        gl.motors.command.drain()
+    w = np.asarray(work) * 1e3
+    res = {"polls": len(player), "ticks": len(work), "dt_ms": dt * 1e3, "wall_s": wall,
+           "ticks_per_s": len(work) / wall, "speedup": len(work) * dt / wall,
+           "tick_p99_ms": float(np.percentile(w, 99)), "tick_max_ms": float(w.max()),
+           "digest": h.hexdigest()[:16]}
+    print(", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in res.items()))
+    if expect is not None and res["digest"] != expect:
+        print(f"FAIL: digest {res['digest']} != {expect}", file=sys.stderr)
+        sys.exit(1)
+    return res
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("path")
+    ap.add_argument("--expect", metavar="DIGEST", help="exit 1 if the run digest differs")
+    args = ap.parse_args()
+    run(args.path, args.expect)
@@ -0,0 +1,217 @@
+"""Shared-memory joystick service: one process owns the pad, the rest read it.
+
+    python3 pad_shm.py            # input owner (main_menu starts it for you)
+
+The owner publishes axes, button bits and per-button press counters into a
+small SharedMemory block guarded by a sequence lock (odd = write in
+progress). Readers never block the owner: they copy the block and retry if
+the sequence moved. Each reader keeps its own counter cursor, so edge
+detection in one process can no longer eat an edge another one needed.
+
+A second owner will not take over a block whose owner is still alive (its
+pid exists or its sequence still moves); only a dead owner's block is
+replaced.
+"""
+import os, struct, subprocess, sys, time
+from multiprocessing import shared_memory, resource_tracker
+
+SHM_NAME = os.environ.get("FIVELINK_PAD_SHM", "fivelink_pad")   # one block per station
+MAGIC    = 0x46564C50          # "FVLP"
+VERSION  = 1
+RATE_HZ  = 250                 # owner publish rate
+STALE_S  = 0.5                 # readers treat older data as "no pad"
+
+DIGITAL = ("up", "down", "left", "right", "sel", "back", "ltrig")
+AXES    = ("lx", "ly", "rx", "ry", "lt")
+
+_HEAD = struct.Struct("<IHHI")                                   # magic, version, pad, seq
+_BODY = struct.Struct(f"<Id{len(AXES)}fI{len(DIGITAL)}I")        # pid, stamp, axes, bits, presses
+SIZE  = _HEAD.size + _BODY.size
+_SEQ_OFF = 8
+
+
+def _live_owner(name):
+    """pid of the process still publishing block `name`, or None if it is stale."""
+    try:
+        shm = shared_memory.SharedMemory(name)
+    except FileNotFoundError:
+        return None
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")   # see attach()
+    except Exception:
+        pass
+    try:
+        if shm.size < SIZE:
+            return None
+        pid = _BODY.unpack_from(shm.buf, _HEAD.size)[0]
+        if pid and pid != os.getpid():
+            try:
+                os.kill(pid, 0)
+                return pid
+            except PermissionError:                  # exists, someone else's
+                return pid
+            except ProcessLookupError:
+                pass
+        seq = struct.unpack_from("<I", shm.buf, _SEQ_OFF)[0]
+        end = time.monotonic() + STALE_S
+        while time.monotonic() < end:                # no pid yet, or gone: still written?
+            time.sleep(0.01)
+            if struct.unpack_from("<I", shm.buf, _SEQ_OFF)[0] != seq:
+                return pid or -1
+        return None
+    finally:
+        shm.close()
+
+
+class Writer:
+    def __init__(self, name=SHM_NAME):
+        try:
+            self.shm = shared_memory.SharedMemory(name, create=True, size=SIZE)
+        except FileExistsError:
+            pid = _live_owner(name)
+            if pid is not None:
+                raise RuntimeError(f"{name} is already published by pid {pid}")
+            old = shared_memory.SharedMemory(name)   # left behind by a dead owner
+            old.close(); old.unlink()
+            self.shm = shared_memory.SharedMemory(name, create=True, size=SIZE)
+        self.seq = 0
+        self.presses = [0] * len(DIGITAL)
+        self._bits = 0
+        _HEAD.pack_into(self.shm.buf, 0, MAGIC, VERSION, 0, self.seq)
+
+    def publish(self, state, axes):
+        bits = 0
+        for i, k in enumerate(DIGITAL):
+            if state[k]:
+                bits |= 1 << i
+                if not self._bits & (1 << i):
+                    self.presses[i] += 1
+        self._bits = bits
+
+        buf = self.shm.buf
+        self.seq += 1                                        # odd: writing
+        struct.pack_into("<I", buf, _SEQ_OFF, self.seq)
+        _BODY.pack_into(buf, _HEAD.size, os.getpid(), time.monotonic(),
+                        *(axes[k] for k in AXES), bits, *self.presses)
+        self.seq += 1                                        # even: stable
+        struct.pack_into("<I", buf, _SEQ_OFF, self.seq)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class Reader:
+    def __init__(self, shm):
+        self.shm = shm
+        self._seen = None          # presses at the last poll(), per reader
+
+    def snapshot(self, retries=100):
+        """(stamp, axes dict, state dict, presses tuple) or None if torn/stale."""
+        buf = self.shm.buf
+        for _ in range(retries):
+            s1 = struct.unpack_from("<I", buf, _SEQ_OFF)[0]
+            if s1 & 1:
+                continue
+            body = _BODY.unpack_from(buf, _HEAD.size)
+            if struct.unpack_from("<I", buf, _SEQ_OFF)[0] == s1:
+                break
+        else:
+            return None
+        stamp = body[1]
+        axes  = dict(zip(AXES, body[2:2 + len(AXES)]))
+        bits  = body[2 + len(AXES)]
+        presses = body[3 + len(AXES):]
+        if time.monotonic() - stamp > STALE_S:
+            axes  = dict.fromkeys(AXES, 0.0)
+            bits  = 0
+        state = {k: (bits >> i) & 1 for i, k in enumerate(DIGITAL)}
+        return stamp, axes, state, presses
+
+    def poll(self):
+        """Same shape as controller.poll()."""
+        snap = self.snapshot()
+        if snap is None:
+            return {"event": dict.fromkeys(DIGITAL, 0),
+                    "state": dict.fromkeys(DIGITAL, 0),
+                    "axes":  dict.fromkeys(AXES, 0.0)}
+        _, axes, state, presses = snap
+        seen = self._seen or presses
+        self._seen = presses
+        event = {k: int(presses[i] != seen[i]) for i, k in enumerate(DIGITAL)}
+        return {"event": event, "state": state, "axes": axes}
+
+
+def attach(name=SHM_NAME):
+    """Reader for a running owner, or None."""
+    try:
+        shm = shared_memory.SharedMemory(name)
+    except (FileNotFoundError, OSError):
+        return None
+    # readers must not unlink the owner's block when they exit (bpo-39959)
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    magic, ver, _, _ = _HEAD.unpack_from(shm.buf, 0)
+    if magic != MAGIC or ver != VERSION or shm.size < SIZE:
+        shm.close()
+        return None
+    r = Reader(shm)
+    snap = r.snapshot()
+    if snap is None or time.monotonic() - snap[0] > STALE_S:
+        shm.close()
+        return None
+    return r
+
+
+def ensure_service(timeout=3.0):
+    """Start the owner process unless one is already publishing."""
+    r = attach()
+    if r is not None:
+        r.shm.close()
+        return None
+    py = sys.executable or "python3"
+    proc = subprocess.Popen([py, os.path.join(os.path.dirname(os.path.abspath(__file__)), "pad_shm.py")])
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        r = attach()
+        if r is not None:
+            r.shm.close()
+            return proc
+        if proc.poll() is not None:
+            break
+        time.sleep(0.02)
+    print("[pad] input service did not come up, using local pygame", file=sys.stderr)
+    return proc
+
+
+def serve(rate_hz=RATE_HZ):
+    try:
+        w = Writer()
+    except RuntimeError as exc:                 # another owner is alive: leave it be
+        print("[pad]", exc, file=sys.stderr)
+        return
+    os.environ["FIVELINK_PAD"] = "local"        # this process owns the joystick
+    import pygame, controller
+
+    parent = os.getppid()
+    period = 1.0 / rate_hz
+    nxt = time.monotonic()
+    print(f"[pad] serving {SHM_NAME} at {rate_hz} Hz", file=sys.stderr)
+    try:
+        while os.getppid() == parent:           # exit with whoever started us
+            # SDL turns SIGTERM/SIGINT into QUIT events
+            if any(e.type == pygame.QUIT for e in pygame.event.get()):
+                break
+            w.publish(controller._dig_now(), controller._axes_now())
+            nxt += period
+            time.sleep(max(0.0, nxt - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        w.close()
+
+
+if __name__ == "__main__":
+    serve()
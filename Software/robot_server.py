@@ -0,0 +1,187 @@
+"""Long-lived robot daemon: imports, motor buses and the IK table stay warm.
+
+    python3 robot_server.py            # main_menu starts it for you
+
+Control API is one JSON line per request on 127.0.0.1:ROBOT_PORT:
+
+    {"cmd": "start", "rate": 100}  → begin a game session (reset + torque on)
+    {"cmd": "stop"}                → end the session, servos hold position
+    {"cmd": "torque_off"}          → stop and release all motors
+    {"cmd": "status"}              → session state and control-loop stats
+    {"cmd": "shutdown"}            → torque off and exit
+
+Clients use request() / ensure_server(); nothing here imports game_logic
+unless it is the server process.
+"""
+import json, os, socket, socketserver, subprocess, sys, threading, time, traceback
+
+HOST, ROBOT_PORT = "127.0.0.1", 47611
+CONNECT_TIMEOUT  = 0.5
+
+
+# client side
+
+def request(cmd, timeout=5.0, **args):
+    with socket.create_connection((HOST, ROBOT_PORT), timeout=timeout) as s:
+        s.sendall((json.dumps({"cmd": cmd, **args}) + "\n").encode())
+        with s.makefile("r", encoding="utf-8") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("robot server closed the connection")
+    return json.loads(line)
+
+
+def is_running():
+    try:
+        return request("status", timeout=CONNECT_TIMEOUT).get("ok", False)
+    except (OSError, ValueError):
+        return False
+
+
+def ensure_server(wait=True, timeout=20.0):
+    """Spawn the daemon unless one answers. With wait=False return right away."""
+    if is_running():
+        return None
+    py = sys.executable or "python3"
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.Popen([py, os.path.join(here, "robot_server.py")], cwd=here)
+    if not wait:
+        return proc
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if is_running():                # ours, or one another client raced us to
+            return proc
+        time.sleep(0.05)
+    raise ConnectionError("robot server did not start")
+
+
+# server side
+
+class Robot:
+    def __init__(self, gl, recorder=None):
+        self.gl = gl
+        self.recorder = recorder
+        self.loop = None
+        self.sessions = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _stop_loop(self):
+        if self.loop is not None:
+            self.loop.stop()
+
+    def start(self, rate=None):
+        gl = self.gl
+        with self.lock:
+            if self.loop is not None and self.loop.is_alive():
+                return {"ok": False, "error": "session already running"}
+            t0 = time.perf_counter()
+            gl.torque_on()
+            gl.reset()
+            self.loop = gl.ControlLoop(gl.control_step, float(rate or gl.CONTROL_HZ),
+                                      recorder=self.recorder).start()
+            self.sessions += 1
+            return {"ok": True, "session": self.sessions, "start_ms": (time.perf_counter() - t0) * 1e3}
+
+    def stop(self):
+        with self.lock:
+            self._stop_loop()
+            return {"ok": True, "loop": self.loop.stats() if self.loop else None}
+
+    def torque_off(self):
+        with self.lock:
+            self._stop_loop()
+            self.gl.torque_off()
+            return {"ok": True}
+
+    def status(self):
+        loop = self.loop
+        if loop is None:
+            state = "idle"
+        elif loop.is_alive():
+            state = "running"
+        else:
+            state = "ended"                         # ◯ pressed or stopped
+        return {
+            "ok": True, "pid": os.getpid(), "session": state, "sessions": self.sessions,
+            "uptime_s": time.monotonic() - self.started,
+            "loop": loop.stats() if loop else None,
+            "snapshot": loop.snapshot if loop else None,
+            "buses": self.gl.motors.bus_stats(),
+        }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        robot = self.server.robot
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+                cmd = req.pop("cmd")
+                if cmd == "start":
+                    rep = robot.start(req.get("rate"))
+                elif cmd == "stop":
+                    rep = robot.stop()
+                elif cmd == "torque_off":
+                    rep = robot.torque_off()
+                elif cmd == "status":
+                    rep = robot.status()
+                elif cmd == "shutdown":
+                    rep = robot.torque_off()
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    rep = {"ok": False, "error": f"unknown cmd {cmd!r}"}
+            except Exception as exc:  # noqa: BLE001
+                traceback.print_exc()
+                rep = {"ok": False, "error": str(exc)}
+            self.wfile.write((json.dumps(rep, default=_jsonable) + "\n").encode())
+
+
+def _jsonable(o):
+    if hasattr(o, "tolist"):
+        return o.tolist()
+    raise TypeError(type(o).__name__)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve():
+    t0 = time.perf_counter()
+    # bind first: a second instance fails here before it touches the buses
+    srv = _Server((HOST, ROBOT_PORT), _Handler)
+
+    if "--headless" not in sys.argv:
+        sys.argv.append("--headless")
+    import game_logic, startup, flight_recorder
+    startup.report()
+    srv.robot = Robot(game_logic, flight_recorder.open_default())
+    robot = srv.robot
+    print(f"[robot] warm in {time.perf_counter() - t0:.2f} s, listening on {HOST}:{ROBOT_PORT}",
+          file=sys.stderr)
+
+    parent = os.getppid()
+
+    def _watch_parent():                           # exit with whoever started us
+        while os.getppid() == parent:
+            time.sleep(0.5)
+        srv.shutdown()
+
+    threading.Thread(target=_watch_parent, daemon=True).start()
+    try:
+        srv.serve_forever(poll_interval=0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        try:
+            robot.torque_off()
+        finally:
+            if robot.recorder is not None:
+                robot.recorder.close()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,32 @@
+"""Cold-start timing: startup.mark("phase") after each step, report() at the end.
+
+Enable the printout with --startup-report or FIVELINK_STARTUP_REPORT=1.
+"""
+import os, sys, time
+
+T0 = time.perf_counter()
+_marks = []
+
+ENABLED = "--startup-report" in sys.argv or os.environ.get("FIVELINK_STARTUP_REPORT") == "1"
+
+
+def mark(label):
+    _marks.append((label, time.perf_counter()))
+
+
+def phases():
+    out, prev = [], T0
+    for label, t in _marks:
+        out.append((label, t - prev))
+        prev = t
+    return out
+
+
+def report(file=sys.stderr, force=False):
+    if not (ENABLED or force):
+        return
+    total = (_marks[-1][1] if _marks else time.perf_counter()) - T0
+    print("[startup] phase                  ms", file=file)
+    for label, dt in phases():
+        print(f"[startup] {label:<20} {dt * 1e3:8.1f}", file=file)
+    print(f"[startup] {'total':<20} {total * 1e3:8.1f}", file=file)
@@ -0,0 +1,194 @@
+"""Multi-station host: one machine drives several FiveLink robots in parallel.
+
+    python3 stations.py stations.json                  # stations from a config file
+    python3 stations.py --sim 4 --duration 30          # four simulated stations
+    python3 stations.py --sim 2 --pad replay:run.pad   # ... fed from a pad recording
+
+Every station runs game_logic's control loop headless in its own process
+(multiprocessing "spawn"), so each gets its own controller, IK/trajectory
+state, motor buses and I/O workers: nothing but the code is shared, and the
+host scales with cores instead of with copies of scripts. Workers are pinned
+one per CPU where the OS allows it (--no-pin turns that off).
+
+A config file is a list of stations, each a name plus the environment that
+picks its hardware; anything game_logic reads from FIVELINK_* can go there:
+
+    [{"name": "left",  "env": {"FIVELINK_DXL_DEV": "/dev/ttyUSB0",
+                               "FIVELINK_LSS_PORT": "/dev/ttyUSB1",
+                               "FIVELINK_JOYSTICK": "0"}},
+     {"name": "right", "env": {"FIVELINK_DXL_DEV": "/dev/ttyUSB2",
+                               "FIVELINK_LSS_PORT": "/dev/ttyUSB3",
+                               "FIVELINK_JOYSTICK": "1"}, "cpu": 3}]
+
+Unless the station sets them, FIVELINK_PAD_SHM and FIVELINK_FLIGHT get a
+per-station name so stations never read each other's pad or flight log.
+
+Workers send their ControlLoop.stats() every REPORT_S; the supervisor prints
+one [station] line each to stderr and a summary when they have all stopped.
+Other arguments (--velocity, --raw, ...) are passed on to game_logic.
+"""
+import json, multiprocessing as mp, os, queue, sys, time, traceback
+
+REPORT_S = 2.0
+LOG_DIR  = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+
+
+def _fmt(st):
+    return ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in st.items())
+
+
+def _worker(name, env, argv, rate, cpu, out, stop):
+    """Station process: configure, import game_logic, run the loop, report."""
+    os.environ.update(env)
+    os.environ["FIVELINK_STATION"] = name
+    os.environ.setdefault("FIVELINK_PAD_SHM", f"fivelink_pad_{name}")
+    os.environ.setdefault("FIVELINK_FLIGHT", os.path.join(LOG_DIR, f"flight-{name}.rec"))
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except (AttributeError, OSError) as exc:
+            print(f"[station {name}] not pinned to cpu {cpu}:", exc, file=sys.stderr)
+    sys.argv = [sys.argv[0], "--headless", *argv]
+    try:
+        import game_logic as gl, flight_recorder
+        rec = flight_recorder.open_default()
+        gl.torque_on()
+        gl.reset()
+        loop = gl.ControlLoop(gl.control_step, rate or gl.CONTROL_HZ, recorder=rec).start()
+        out.put((name, "ready", {"pid": os.getpid(), "cpu": cpu}))
+        while loop.is_alive() and not stop.wait(REPORT_S):
+            out.put((name, "stats", loop.stats()))
+        loop.stop()
+        gl.torque_off()
+        gl.controller.close()
+        if rec is not None:
+            rec.close()
+        st = loop.stats()
+        st["quit"] = loop.quit_requested
+        out.put((name, "done", st))
+    except BaseException as exc:  # noqa: BLE001
+        traceback.print_exc()
+        out.put((name, "error", {"error": f"{type(exc).__name__}: {exc}"}))
+
+
+class Supervisor:
+    """Starts one worker per station and collects their loop timing."""
+
+    def __init__(self, stations, rate=None, argv=(), pin=True):
+        self.stations = stations
+        self.rate = rate
+        self.argv = list(argv)
+        self.ctx = mp.get_context("spawn")       # fresh interpreter: no inherited buses or pads
+        self.out = self.ctx.Queue()
+        self.stop_event = self.ctx.Event()
+        self.procs = {}
+        self.last = {}                           # name → latest stats
+        self.state = {}                          # name → starting | running | done | error
+        cpus = sorted(os.sched_getaffinity(0)) if pin and hasattr(os, "sched_getaffinity") else []
+        if cpus and len(stations) > len(cpus):
+            print(f"[stations] {len(stations)} stations on {len(cpus)} CPUs: sharing cores",
+                  file=sys.stderr)
+        self.cpus = {s["name"]: s.get("cpu", cpus[i % len(cpus)] if cpus else None)
+                     for i, s in enumerate(stations)}
+
+    def start(self):
+        for s in self.stations:
+            name = s["name"]
+            p = self.ctx.Process(target=_worker, name=f"station-{name}",
+                                 args=(name, dict(s.get("env", {})), self.argv + list(s.get("args", [])),
+                                       s.get("rate", self.rate), self.cpus[name], self.out, self.stop_event))
+            p.start()
+            self.procs[name] = p
+            self.state[name] = "starting"
+        return self
+
+    def stop(self, timeout=5.0):
+        self.stop_event.set()
+        end = time.monotonic() + timeout
+        while any(v in ("starting", "running") for v in self.state.values()) and time.monotonic() < end:
+            self._collect(0.1)
+        for name, p in self.procs.items():
+            p.join(max(0.0, end - time.monotonic()))
+            if p.is_alive():
+                print(f"[station {name}] did not stop, terminating", file=sys.stderr)
+                p.terminate()
+                p.join(1.0)
+
+    def _collect(self, timeout):
+        try:
+            name, kind, data = self.out.get(timeout=timeout)
+        except queue.Empty:
+            pass
+        else:
+            if kind == "ready":
+                self.state[name] = "running"
+                print(f"[station {name}] pid {data['pid']}, cpu {data['cpu']}", file=sys.stderr)
+            elif kind == "stats":
+                self.last[name] = data
+            elif kind in ("done", "error"):
+                self.state[name] = kind
+                self.last[name] = {**self.last.get(name, {}), **data}
+        for name, p in self.procs.items():          # died without saying so
+            if self.state[name] in ("starting", "running") and not p.is_alive():
+                self.state[name] = "error"
+                self.last.setdefault(name, {})["error"] = f"exit code {p.exitcode}"
+
+    def running(self):
+        return any(v in ("starting", "running") for v in self.state.values())
+
+    def report(self):
+        for s in self.stations:
+            name = s["name"]
+            st = self.last.get(name)
+            print(f"[station {name}] {self.state[name]}" + (f": {_fmt(st)}" if st else ""),
+                  file=sys.stderr)
+
+    def run(self, duration=None, every=REPORT_S):
+        """Supervise until every station stops, Ctrl-C, or `duration` seconds."""
+        t0 = time.monotonic()
+        nxt = t0 + every
+        try:
+            while self.running():
+                self._collect(0.1)
+                now = time.monotonic()
+                if duration is not None and now - t0 >= duration:
+                    break
+                if now >= nxt:
+                    self.report()
+                    nxt += every
+        except KeyboardInterrupt:
+            pass
+        self.stop()
+        self.report()
+        return self.last
+
+
+def load_config(path):
+    with open(path, encoding="utf-8") as f:
+        stations = json.load(f)
+    names = [s["name"] for s in stations]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path}: station names must be unique")
+    return stations
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("config", nargs="?", help="JSON list of stations")
+    ap.add_argument("--sim", type=int, metavar="N", help="N stations on the simulated motors")
+    ap.add_argument("--pad", help="FIVELINK_PAD for --sim stations (e.g. replay:run.pad)")
+    ap.add_argument("--rate", type=float, help="control rate (Hz) for every station")
+    ap.add_argument("--duration", type=float, help="stop after this many seconds")
+    ap.add_argument("--no-pin", action="store_true", help="do not pin stations to CPUs")
+    args, rest = ap.parse_known_args()
+    if args.config:
+        stations = load_config(args.config)
+    elif args.sim:
+        env = {"FIVELINK_MOTORS": "sim"}
+        if args.pad:
+            env["FIVELINK_PAD"] = args.pad
+        stations = [{"name": f"sim{i}", "env": dict(env)} for i in range(1, args.sim + 1)]
+    else:
+        ap.error("give a config file or --sim N")
+    Supervisor(stations, args.rate, rest, pin=not args.no_pin).start().run(args.duration)
@@ -0,0 +1,18 @@
+"""The scripts in Software/ are top-level modules; import them from there.
+
+game_logic configures itself at import time, so the environment is set
+here first: simulated motors, writes on the calling thread, no feedback
+poller, the local (absent) pad and no window.
+"""
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("FIVELINK_MOTORS", "sim")
+os.environ.setdefault("FIVELINK_SIM_WIRE", "0")
+os.environ.setdefault("FIVELINK_IO_WORKERS", "0")
+os.environ.setdefault("FIVELINK_LSS_FEEDBACK_HZ", "0")
+os.environ.setdefault("FIVELINK_PAD", "local")
+os.environ.setdefault("FIVELINK_FLIGHT", "0")
+if "--headless" not in sys.argv:
+    sys.argv.append("--headless")
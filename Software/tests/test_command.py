@@ -0,0 +1,137 @@
+import types
+
+import pytest
+
+from motors import command
+
+
+class Clock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(command, "time", types.SimpleNamespace(monotonic=c, perf_counter=c))
+    return c
+
+
+def _channel(name, **kw):
+    sent = []
+
+    def send(q):
+        sent.append(q)
+        return 10, 0, 1
+    return command.Channel(f"test-{name}", name, send, **kw), sent
+
+
+def test_quantize_and_dedupe(clock):
+    ch, sent = _channel("dedupe", quantize=round)
+    assert ch.offer(10.2)
+    assert not ch.offer(9.8)               # same device value
+    assert ch.offer(11.4)
+    assert sent == [10, 11]
+    assert (ch.sent, ch.dropped) == (2, 1)
+    assert ch.bus.transactions == 2 and ch.bus.tx_bytes == 20
+
+
+def test_deadband(clock):
+    ch, sent = _channel("deadband", deadband=3)
+    ch.offer(100)
+    assert not ch.offer(103)
+    assert ch.offer(104)
+    assert sent == [100, 104]
+
+
+def test_tuple_values(clock):
+    ch, sent = _channel("pose", quantize=lambda v: tuple(int(x) for x in v), deadband=1)
+    ch.offer((100, 200))
+    assert not ch.offer((101, 199))
+    assert ch.offer((100, 202))
+    assert sent == [(100, 200), (100, 202)]
+
+
+def test_min_interval_holds_the_latest(clock):
+    ch, sent = _channel("rate", min_interval=0.05)
+    assert ch.offer(1)
+    clock.t += 0.01
+    assert not ch.offer(2)
+    assert not ch.offer(3)                 # replaces 2
+    command.flush()
+    assert sent == [1]                     # not due yet
+    clock.t += 0.05
+    command.flush()
+    assert sent == [1, 3]
+    assert (ch.deferred, ch.dropped) == (2, 1)
+    command.flush()
+    assert sent == [1, 3]
+
+
+def test_a_repeat_cancels_the_held_value(clock):
+    ch, sent = _channel("cancel", min_interval=0.05)
+    ch.offer(1)
+    clock.t += 0.01
+    ch.offer(2)
+    ch.offer(1)                            # back where the device already is
+    clock.t += 0.05
+    command.flush()
+    assert sent == [1]
+
+
+def test_force_and_invalidate(clock):
+    ch, sent = _channel("force", min_interval=1.0)
+    ch.offer(5)
+    assert ch.offer(5, force=True)
+    ch.invalidate()
+    clock.t += 1.0
+    assert ch.offer(5)
+    assert sent == [5, 5, 5]
+
+
+def _flaky(name, worker):
+    sent, fail = [], [True]
+
+    def send(q):
+        if fail[0]:
+            raise OSError("write failed")
+        sent.append(q)
+        return 10, 0, 1
+    ch = command.Channel(f"test-{name}", name, send)
+    if worker:
+        ch.bus.start_worker()
+    return ch, sent, fail
+
+
+@pytest.mark.parametrize("worker", [False, True])
+def test_failed_write_is_retried(worker):
+    ch, sent, fail = _flaky(f"flaky-{worker}", worker)
+    try:
+        ch.offer(7)
+    except OSError:
+        assert not worker                  # the worker logs it instead
+    assert command.drain()
+    fail[0] = False
+    assert ch.offer(7)                     # not deduped against a value that never went out
+    assert command.drain()
+    assert sent == [7] and ch.failed == 1 and ch.last == 7
+
+
+def test_worker_latest_wins_and_cancel():
+    ch, sent, fail = _flaky("slots", True)
+    fail[0] = False
+    w = ch.bus.worker
+    with w.cond:                           # hold the worker off while we post
+        ch.offer(1)
+        ch.offer(2)
+        assert w.slots[ch][0] == 2 and w.replaced == 1
+        ch.cancel()
+        assert ch not in w.slots and ch.last is None
+    assert command.drain()
+    assert sent == []
+    assert ch.offer(2)
+    assert command.drain()
+    assert sent == [2]
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import game_logic as gl
+
+
+def _points():
+    rng = np.random.default_rng(0)
+    grid = np.stack(np.meshgrid(np.arange(-2.6, 2.65, 0.05), np.arange(-2.6, 2.65, 0.05)), -1)
+    return np.vstack((grid.reshape(-1, 2), rng.uniform(-3.0, 3.0, (2000, 2))))
+
+
+def test_batch_matches_scalar_bit_for_bit():
+    pts = _points()
+    e1, e2, th1, th2, ok = gl.inverse_kinematics_batch(pts)
+    with np.errstate(invalid="ignore"):
+        for k, (x, y) in enumerate(pts):
+            s1, s2, t1, t2 = gl.inverse_kinematics(x, y)
+            assert ok[k] == (s1 is not None), (x, y)
+            if ok[k]:
+                assert (t1, t2) == (th1[k], th2[k])
+                assert np.array_equal(s1, e1[k]) and np.array_equal(s2, e2[k])
+            else:
+                assert np.isnan(th1[k]) and np.isnan(th2[k])
+
+
+def test_batch_reaches_the_target():
+    pts = _points()
+    e1, e2, th1, th2, ok = gl.inverse_kinematics_batch(pts)
+    assert ok.any() and not ok.all()
+    # both distal links are L2 long when the elbows are right
+    for e in (e1, e2):
+        assert np.allclose(np.linalg.norm(pts[ok] - e[ok], axis=1), gl.L2)
+
+
+@pytest.mark.parametrize("shape", [(2,), (1, 2), (5, 2)])
+def test_batch_accepts_any_point_shape(shape):
+    pts = np.broadcast_to(np.array(gl.HOME), shape)
+    e1, e2, th1, th2, ok = gl.inverse_kinematics_batch(pts)
+    n = int(np.prod(shape)) // 2
+    assert e1.shape == (n, 2) and th1.shape == (n,) and ok.all()
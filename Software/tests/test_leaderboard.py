@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+import leaderboard
+
+
+@pytest.fixture
+def board(tmp_path):
+    b = leaderboard.Leaderboard(str(tmp_path / "scores.db"), json_file=str(tmp_path / "none.json"))
+    yield b
+    b.close()
+
+
+def _top(b, n=10):
+    return [(e["initials"], e["score"]) for e in b.top(n)]
+
+
+def test_top_orders_by_score_then_first_to_get_there(board):
+    board.add("AAA", 5, ts=3.0)
+    board.add("BBB", 9, ts=2.0)
+    board.add("CCC", 5, ts=1.0)
+    board.add("DDD", 1, ts=4.0)
+    assert _top(board) == [("BBB", 9), ("CCC", 5), ("AAA", 5), ("DDD", 1)]
+    board.flush()
+    assert _top(board, 2) == [("BBB", 9), ("CCC", 5)]
+
+
+def test_pending_scores_show_before_commit(board):
+    board.add("OLD", 3, ts=1.0)
+    board.flush()
+    with board._lock:                      # writer parked: the new score is only pending
+        board._q.put(("NEW", 8, 2.0))
+        board._pending.append(("NEW", 8, 2.0))
+        assert _top(board) == [("NEW", 8), ("OLD", 3)]
+    board.flush()
+    assert _top(board) == [("NEW", 8), ("OLD", 3)]
+    assert board.count() == 2
+
+
+def test_best_and_history(board):
+    for i, s in enumerate((4, 7, 2)):
+        board.add("ABC", s, ts=float(i))
+    board.add("XYZ", 10, ts=9.0)
+    board.flush()
+    assert [e["score"] for e in board.best("ABC")] == [7, 4, 2]
+    assert [e["score"] for e in board.history("ABC", 2)] == [2, 7]
+    assert board.history(n=1)[0]["initials"] == "XYZ"
+
+
+def test_migrates_scores_json_once(tmp_path):
+    src = tmp_path / "scores.json"
+    src.write_text(json.dumps([{"initials": "OLD", "score": 12}, {"initials": "ONE", "score": 3}]))
+    db = str(tmp_path / "scores.db")
+    b = leaderboard.Leaderboard(db, json_file=str(src))
+    b.add("NEW", 5)
+    b.close()
+    assert not src.exists() and (tmp_path / "scores.json.migrated").exists()
+
+    b = leaderboard.Leaderboard(db, json_file=str(src))
+    try:
+        assert _top(b) == [("OLD", 12), ("NEW", 5), ("ONE", 3)]
+        assert b.count() == 3
+    finally:
+        b.close()
+
+
+def test_bad_json_is_left_alone(tmp_path):
+    src = tmp_path / "scores.json"
+    src.write_text("{not json")
+    b = leaderboard.Leaderboard(str(tmp_path / "scores.db"), json_file=str(src))
+    b.close()
+    assert src.exists()
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from trajectory import JointTrajectory
+
+VMAX, AMAX, DT = (3.0, 2.0), (20.0, 10.0), 0.01
+LO, HI = (-4.2, -1.55), (-1.6, 1.19)
+
+
+def _check_limits(qs):
+    """Setpoint speed and acceleration as the servos see them."""
+    for k in range(2):
+        v = [(b[k] - a[k]) / DT for a, b in zip(qs, qs[1:])]
+        assert max(abs(x) for x in v) <= VMAX[k] + 1e-9
+        assert max(abs(b - a) for a, b in zip(v, v[1:])) <= AMAX[k] * DT + 1e-9
+        assert all(LO[k] <= q[k] <= HI[k] for q in qs)
+
+
+def _run(traj, ticks=2000):
+    qs, vs = [list(traj.q)], [list(traj.v)]
+    for _ in range(ticks):
+        qs.append(list(traj.step(DT)))
+        vs.append(list(traj.v))
+        if traj.settled:
+            break
+    return qs, vs
+
+
+@pytest.mark.parametrize("start, target", [
+    ((-3.0, 0.0), (-1.7, 1.0)),        # long move: hits vmax
+    ((-2.0, 0.0), (-2.05, -0.02)),     # short move: triangular profile
+    ((-1.7, 1.0), (-4.0, -1.5)),
+])
+def test_limits_and_arrival(start, target):
+    traj = JointTrajectory(VMAX, AMAX, LO, HI)
+    traj.reset(start)
+    traj.set_target(target)
+    qs, vs = _run(traj)
+    assert traj.settled and qs[-1] == list(target)
+    _check_limits(qs)
+    for k in range(2):
+        assert all(abs(b[k] - a[k]) <= AMAX[k] * DT + 1e-9 for a, b in zip(vs, vs[1:]))
+
+
+def test_retargeting_mid_move():
+    rng = random.Random(0)
+    for _ in range(100):
+        traj = JointTrajectory(VMAX, AMAX, LO, HI)
+        traj.reset([rng.uniform(lo, hi) for lo, hi in zip(LO, HI)])
+        qs = [list(traj.q)]
+        for _ in range(3):               # new stick target before the last one is reached
+            target = [rng.uniform(lo, hi) for lo, hi in zip(LO, HI)]
+            traj.set_target(target)
+            qs += [list(traj.step(DT)) for _ in range(rng.randint(1, 150))]
+        more, _ = _run(traj)
+        qs += more[1:]
+        assert traj.settled and traj.q == target
+        _check_limits(qs)
+
+
+def test_target_is_clamped_to_the_joint_limits():
+    traj = JointTrajectory(VMAX, AMAX, LO, HI)
+    traj.reset((-2.0, 0.0))
+    traj.set_target((-10.0, 10.0))
+    assert traj.target == [LO[0], HI[1]]
+    _run(traj)
+    assert traj.q == [LO[0], HI[1]]
+
+
+def test_first_target_jumps():
+    traj = JointTrajectory(VMAX, AMAX, LO, HI)
+    assert traj.step(DT) is None
+    traj.set_target((-2.0, 0.5))
+    assert traj.step(DT) == [-2.0, 0.5] and traj.settled
@@ -0,0 +1,56 @@
+import numpy as np
+
+import game_logic as gl
+import workspace
+
+SERVO_COUNT = 2 * np.pi / 4096 / 2     # one servo count, in joint radians
+
+
+def _build(**kw):
+    return workspace.build(gl.inverse_kinematics_batch, gl.joint_to_servo, gl.joint_jacobian_batch, **kw)
+
+
+def test_stick_targets_hit_the_table():
+    table = _build()
+    rng = np.random.default_rng(1)
+    hits = 0
+    with np.errstate(invalid="ignore"):
+        for x, y in rng.uniform(-2.5, 2.5, (3000, 2)):
+            got = table.get(x, y)
+            if got is None:
+                continue
+            hits += 1
+            e1, e2, th1, th2 = gl.inverse_kinematics(x, y)
+            assert e1 is not None, "interpolated a point outside the workspace"
+            assert abs(got[2] - th1) < SERVO_COUNT and abs(got[3] - th2) < SERVO_COUNT
+    assert hits > 1000
+
+
+def test_grid_nodes_are_exact():
+    table = _build()
+    i, j = np.argwhere(table.fine)[len(np.argwhere(table.fine)) // 2]
+    x, y = table.nodes[i], table.nodes[j]
+    _, _, th1, th2 = table.get(x, y)
+    assert np.isclose(th1, table.theta1[i, j], atol=1e-12)
+    assert np.isclose(th2, table.theta2[i, j], atol=1e-12)
+
+
+def test_off_grid_and_edge_cells_fall_back():
+    table = _build()
+    assert table.get(3.0, 0.0) is None
+    assert table.get(0.0, -2.6) is None
+    # the hoop corner is cut out of the workspace: no cell straddling x = 1 there
+    assert table.get(1.02, -2.0) is None
+
+
+def test_cache_rebuilds_a_truncated_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace, "CACHE_DIR", str(tmp_path))
+    args = (gl.inverse_kinematics_batch, gl.joint_to_servo, gl.joint_jacobian_batch,
+            (gl.L1, gl.L2, gl.base1, gl.base2))
+    first = workspace.load_or_build(*args)
+    (path,) = tmp_path.glob("workspace_*.npz")
+    path.write_bytes(path.read_bytes()[:100])
+    again = workspace.load_or_build(*args)
+    assert np.array_equal(first.fine, again.fine)
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]     # no temp files left
+    assert workspace.load_or_build(*args).n == first.n
@@ -0,0 +1,74 @@
+"""Velocity/acceleration-limited joint setpoints between IK targets and FiveBar.
+
+Each joint follows its target with a discrete time-optimal profile: it
+accelerates at most `amax`, cruises at most `vmax` and starts braking early
+enough to stop on the target, so the servos get a smooth ramp instead of one
+step per joystick tick. The braking speed is the exact one for steps of
+dt (not the continuous sqrt(2·a·d)), so the setpoints themselves respect
+the limits up to the last tick, and the joint never runs into lo/hi faster
+than it can stop.
+"""
+import math
+
+
+def _stop_speed(d, adt, dt):
+    """Largest speed that still stops within d when each tick sheds at most adt.
+
+    From v the steps are v, v - adt, ... down to the last one ≤ adt; with
+    m + 1 such steps the distance is dt·((m + 1)·v - adt·m(m + 1)/2).
+    """
+    if d <= 0.0:
+        return 0.0
+    n = d / (adt * dt)                                    # d in units of adt·dt
+    m = max(0, math.ceil((math.sqrt(1.0 + 8.0 * n) - 1.0) / 2.0) - 1)
+    return adt * (n + m * (m + 1) / 2.0) / (m + 1)
+
+
+class JointTrajectory:
+    def __init__(self, vmax, amax, lo, hi):
+        """vmax/amax/lo/hi are per-joint sequences (rad/s, rad/s², rad)."""
+        self.vmax, self.amax = list(vmax), list(amax)
+        self.lo, self.hi = list(lo), list(hi)
+        self.n = len(self.vmax)
+        self.q = None                 # current setpoint, None until first target
+        self.v = [0.0] * self.n
+        self.target = None
+
+    def reset(self, q=None):
+        """Jump straight to q (or forget the state if None)."""
+        self.q = None if q is None else [float(x) for x in q]
+        self.target = None if q is None else list(self.q)
+        self.v = [0.0] * self.n
+
+    def set_target(self, q):
+        q = [min(max(float(x), lo), hi) for x, lo, hi in zip(q, self.lo, self.hi)]
+        if self.q is None:            # nothing known yet, start there
+            self.reset(q)
+        self.target = q
+
+    @property
+    def settled(self):
+        return self.q is None or (self.q == self.target and not any(self.v))
+
+    def step(self, dt):
+        """Advance by dt and return the new setpoint (None before the first target)."""
+        if self.q is None or self.settled:
+            return self.q
+        for i in range(self.n):
+            q, v = self.q[i], self.v[i]
+            e = self.target[i] - q
+            adt = self.amax[i] * dt
+            # fastest speed from which we can still brake onto the target, or short of a limit
+            v_des = math.copysign(min(self.vmax[i], _stop_speed(abs(e), adt, dt)), e)
+            v_des = max(-_stop_speed(q - self.lo[i], adt, dt),
+                        min(_stop_speed(self.hi[i] - q, adt, dt), v_des))
+            v += max(-adt, min(adt, v_des - v))
+            if abs(v * dt) >= abs(e) and abs(e / dt - self.v[i]) <= adt and abs(e / dt) <= adt:
+                # the target is in reach this tick: land on it, stop on the next one
+                self.q[i], self.v[i] = self.target[i], e / dt
+                continue
+            q = min(max(q + v * dt, self.lo[i]), self.hi[i])
+            if q in (self.lo[i], self.hi[i]):
+                v = 0.0
+            self.q[i], self.v[i] = q, v
+        return self.q
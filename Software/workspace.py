@@ -0,0 +1,152 @@
+"""Precomputed IK table for the 0.05 grid, cached on disk.
+
+The table is keyed on the arm geometry and the solver code, so it is only
+rebuilt when L1/L2/base1/base2 (or the joint limits) change.
+
+Targets between nodes (stick input) are interpolated bilinearly over their
+cell. A cell is only used when its four corners are reachable and the
+interpolation is within INTERP_TOL of the exact IK at the cell centre; the
+rest (edges of the workspace, near-singular poses) go to the closed form.
+
+Alongside the IK it keeps a manipulability map: `gain` is the largest joint
+rate per unit of end-effector speed at each node (max row norm of dθ/dp),
+`manip` is |det(dp/dθ)|. Both blow up / go to zero at singular poses.
+"""
+import hashlib, os, tempfile, zipfile
+import numpy as np
+
+STEP   = 0.05
+EXTENT = 2.5               # grid covers [-EXTENT, EXTENT] in x and y
+INTERP_TOL = 2.5e-4        # rad at the cell centre, about ⅓ of a servo count
+FORMAT = 2                 # bump when the stored arrays change
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+def _code_key(fn):
+    c = fn.__code__
+    return c.co_code + repr(c.co_consts).encode()
+
+
+def cache_key(ik_batch, to_servo, jacobian, geometry, step=STEP, extent=EXTENT):
+    h = hashlib.sha1()
+    L1, L2, base1, base2 = geometry
+    h.update(repr((FORMAT, float(L1), float(L2), list(map(float, base1)),
+                   list(map(float, base2)), step, extent, INTERP_TOL)).encode())
+    h.update(_code_key(ik_batch))
+    h.update(_code_key(to_servo))
+    h.update(_code_key(jacobian))
+    return h.hexdigest()[:16]
+
+
+class WorkspaceTable:
+    def __init__(self, step, extent, ok, fine, elbow1, elbow2, theta1, theta2,
+                 servo_right, servo_left, gain, manip):
+        self.step, self.extent = float(step), float(extent)
+        self.n = ok.shape[0]
+        self.nodes = np.linspace(-self.extent, self.extent, self.n)
+        self.ok = ok
+        self.fine = fine                  # [i, j]: cell between nodes i..i+1, j..j+1 interpolates
+        self.elbow1, self.elbow2 = elbow1, elbow2
+        self.theta1, self.theta2 = theta1, theta2
+        self.servo_right, self.servo_left = servo_right, servo_left
+        self.gain, self.manip = gain, manip
+
+    def nearest(self, x, y):
+        """(i, j) of the closest grid node, or None outside the grid."""
+        i = int(round((x + self.extent) / self.step))
+        j = int(round((y + self.extent) / self.step))
+        if 0 <= i < self.n and 0 <= j < self.n:
+            return i, j
+        return None
+
+    def get(self, x, y):
+        """Same 4-tuple as inverse_kinematics, interpolated over the cell of (x, y).
+
+        None when that cell is off the grid or not `fine`: the caller solves it.
+        """
+        fi = (x + self.extent) / self.step
+        fj = (y + self.extent) / self.step
+        if not (0.0 <= fi <= self.n - 1 and 0.0 <= fj <= self.n - 1):
+            return None
+        i = min(int(fi), self.n - 2)
+        j = min(int(fj), self.n - 2)
+        if not self.fine[i, j]:
+            return None
+        u, v = fi - i, fj - j
+        w00, w10, w01, w11 = (1 - u) * (1 - v), u * (1 - v), (1 - u) * v, u * v
+
+        def lerp(a):
+            return a[i, j] * w00 + a[i + 1, j] * w10 + a[i, j + 1] * w01 + a[i + 1, j + 1] * w11
+
+        return lerp(self.elbow1), lerp(self.elbow2), float(lerp(self.theta1)), float(lerp(self.theta2))
+
+    def _arrays(self):
+        return dict(step=self.step, extent=self.extent, ok=self.ok, fine=self.fine,
+                    elbow1=self.elbow1, elbow2=self.elbow2,
+                    theta1=self.theta1, theta2=self.theta2,
+                    servo_right=self.servo_right, servo_left=self.servo_left,
+                    gain=self.gain, manip=self.manip)
+
+
+def build(ik_batch, to_servo, jacobian, step=STEP, extent=EXTENT):
+    """jacobian(points, e1, e2, th1, th2) → (N, 2, 2) dθ/dp, NaN where undefined."""
+    n = int(round(2 * extent / step)) + 1
+    nodes = np.linspace(-extent, extent, n)
+    gx, gy = np.meshgrid(nodes, nodes, indexing="ij")        # [i, j] = (x_i, y_j)
+    pts = np.column_stack((gx.ravel(), gy.ravel()))
+    e1, e2, th1, th2, ok = ik_batch(pts)
+    sr, sl = to_servo(th1, th2)
+    jinv = jacobian(pts, e1, e2, th1, th2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gain = np.sqrt((jinv * jinv).sum(axis=2)).max(axis=1)
+        manip = 1.0 / np.abs(np.linalg.det(np.where(np.isfinite(jinv), jinv, 0.0)))
+    gain = np.where(ok, gain, np.nan)
+    manip = np.where(ok & np.isfinite(manip), manip, 0.0)
+    ok, th1, th2 = ok.reshape(n, n), th1.reshape(n, n), th2.reshape(n, n)
+
+    # a cell interpolates if its corners are reachable and its centre comes out right
+    mid = nodes[:-1] + step / 2
+    cx, cy = np.meshgrid(mid, mid, indexing="ij")
+    _, _, c1, c2, cok = ik_batch(np.column_stack((cx.ravel(), cy.ravel())))
+    corners = ok[:-1, :-1] & ok[1:, :-1] & ok[:-1, 1:] & ok[1:, 1:]
+
+    def centre(a):
+        return (a[:-1, :-1] + a[1:, :-1] + a[:-1, 1:] + a[1:, 1:]) / 4
+
+    with np.errstate(invalid="ignore"):
+        err = np.maximum(np.abs(centre(th1) - c1.reshape(n - 1, n - 1)),
+                         np.abs(centre(th2) - c2.reshape(n - 1, n - 1)))
+    fine = corners & cok.reshape(n - 1, n - 1) & (err <= INTERP_TOL)
+
+    return WorkspaceTable(
+        step, extent, ok, fine,
+        e1.reshape(n, n, 2), e2.reshape(n, n, 2),
+        th1, th2,
+        sr.reshape(n, n), sl.reshape(n, n),
+        gain.reshape(n, n), manip.reshape(n, n),
+    )
+
+
+def load_or_build(ik_batch, to_servo, jacobian, geometry, step=STEP, extent=EXTENT):
+    key = cache_key(ik_batch, to_servo, jacobian, geometry, step, extent)
+    path = os.path.join(CACHE_DIR, f"workspace_{key}.npz")
+    try:
+        with np.load(path) as z:
+            return WorkspaceTable(**{k: z[k] for k in z.files})
+    except (OSError, KeyError, ValueError, TypeError, EOFError, zipfile.BadZipFile):
+        pass                              # missing, truncated or from an older FORMAT
+
+    table = build(ik_batch, to_servo, jacobian, step, extent)
+    tmp = None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix="workspace_", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:    # one temp file per process, then an atomic rename
+            np.savez(f, **table._arrays())
+        os.chmod(tmp, 0o644)              # mkstemp makes it private
+        os.replace(tmp, path)
+    except OSError as e:
+        print("[workspace] could not cache table:", e)
+        if tmp is not None and os.path.exists(tmp):
+            os.unlink(tmp)
+    return table